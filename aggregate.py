@@ -0,0 +1,212 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from json_utils import load_json
+from validation import validate_segment
+from layouts import load_layout, cog_from_table
+
+"""
+Map-reduce statistics over a collection of segment files
+- map (one process per file): mergeable partial stats for that segment
+  * per-sensor Welford moments (count, mean, M2) and peak pressure for L and R
+  * fixed-bin histogram of the left-foot load share L / (L + R)
+  * fixed-bin 2D histogram of the combined CoG (feet side by side, layout.feet_table)
+- reduce: partials are merged as they arrive and at most IN_FLIGHT_PER_WORKER are pending per worker,
+  so memory doesn't grow with the number of files
+- incremental: the merged result remembers which files (resolved path, size, mtime) it contains,
+  re-running with the saved state only processes new / changed files
+- usage: python aggregate.py <folder or files...> [--state stats.npz] [--workers N] [--plot]
+"""
+
+layout = load_layout()
+N_SENSORS = layout.n_sensors
+COG_TABLE = layout.feet_table()
+SHARE_BINS = np.linspace(0.0, 1.0, 51)
+COG_BINS_X = np.linspace(COG_TABLE[:, 0].min() - 0.5, COG_TABLE[:, 0].max() + 0.5, 65)
+COG_BINS_Y = np.linspace(COG_TABLE[:, 1].min() - 0.5, COG_TABLE[:, 1].max() + 0.5, 65)
+IN_FLIGHT_PER_WORKER = 2
+
+
+class SegmentStats:
+    """Mergeable partial statistics. Arrays per foot are shaped (2, N) with row 0 = L, row 1 = R."""
+
+    def __init__(self, n_sensors=N_SENSORS):
+        self.count = 0
+        self.mean = np.zeros((2, n_sensors))
+        self.m2 = np.zeros((2, n_sensors))
+        self.peak = np.full((2, n_sensors), -np.inf)
+        self.share_hist = np.zeros(len(SHARE_BINS) - 1, dtype=np.int64)
+        self.cog_hist = np.zeros((len(COG_BINS_X) - 1, len(COG_BINS_Y) - 1), dtype=np.int64)
+        self.files = {}  # path -> [size, mtime]
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else np.zeros_like(self.m2)
+
+    def add_batch(self, left, right):
+        """Fold a (T, N) block of each foot into the statistics."""
+        frames = np.stack([left, right], axis=1).astype(float)  # (T, 2, N)
+        n = len(frames)
+        if n == 0:
+            return self
+        batch = SegmentStats(frames.shape[2])
+        batch.count = n
+        batch.mean = frames.mean(axis=0)
+        batch.m2 = ((frames - batch.mean) ** 2).sum(axis=0)
+        batch.peak = frames.max(axis=0)
+
+        totals = frames.sum(axis=2)  # (T, 2)
+        grand = totals.sum(axis=1)
+        loaded = grand > 0
+        batch.share_hist = np.histogram(totals[loaded, 0] / grand[loaded], bins=SHARE_BINS)[0]
+        cog = batch_cog(left[loaded], right[loaded])
+        batch.cog_hist = np.histogram2d(cog[:, 0], cog[:, 1], bins=(COG_BINS_X, COG_BINS_Y))[0].astype(np.int64)
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Chan et al. parallel combination of Welford moments, plus histogram / peak merge."""
+        if other.count:
+            n = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean = self.mean + delta * (other.count / n)
+            self.m2 = self.m2 + other.m2 + delta * delta * (self.count * other.count / n)
+            self.count = n
+            self.peak = np.maximum(self.peak, other.peak)
+            self.share_hist += other.share_hist
+            self.cog_hist += other.cog_hist
+        self.files.update(other.files)
+        return self
+
+    # ---- Persistence ----
+    def save(self, path):
+        np.savez(path, count=self.count, mean=self.mean, m2=self.m2, peak=self.peak,
+                 share_hist=self.share_hist, cog_hist=self.cog_hist, files=json.dumps(self.files))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            stats = cls(f['mean'].shape[1])
+            stats.count = int(f['count'])
+            stats.mean, stats.m2, stats.peak = f['mean'], f['m2'], f['peak']
+            stats.share_hist, stats.cog_hist = f['share_hist'], f['cog_hist']
+            stats.files = json.loads(str(f['files']))
+        return stats
+
+
+# ---------------------- Map ----------------------
+def batch_cog(left, right):
+    """(T, 2) combined CoG with the feet side by side, vectorized over frames."""
+    return cog_from_table(COG_TABLE, left, right)
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime]
+
+
+def file_key(path):
+    """Key of a file in SegmentStats.files: the resolved path, so relative / absolute runs agree."""
+    return str(Path(path).resolve())
+
+
+def file_stats(path):
+    """Partial statistics of one segment file (runs in a worker process)."""
+    data = load_json(path)
+    stats = SegmentStats()
+    if data:
+        _, left, right, _ = validate_segment(data, n_sensors=N_SENSORS)
+        stats.add_batch(left, right)
+    stats.files[file_key(path)] = file_signature(path)
+    return stats
+
+
+# ---------------------- Reduce ----------------------
+def pending_files(paths, stats):
+    """Files not yet in `stats`, or changed since they were added."""
+    return [p for p in paths if stats.files.get(file_key(p)) != file_signature(p)]
+
+
+def aggregate(paths, stats=None, workers=None):
+    """Merge stats of `paths` into `stats` (new SegmentStats if None), skipping files already included."""
+    stats = SegmentStats() if stats is None else stats
+    paths = list(dict.fromkeys(Path(file_key(p)) for p in paths))
+    todo = pending_files(paths, stats)
+    changed = [p for p in todo if file_key(p) in stats.files]
+    if changed:
+        # moments can't be un-merged: rebuild from scratch when a known file changed, over every
+        # file the state already covered (that still exists) plus the ones given now
+        known = [Path(p) for p in stats.files if Path(p).exists()]
+        return aggregate(known + paths, stats=None, workers=workers)
+    if not todo:
+        return stats
+    if workers == 1:
+        for path in todo:
+            stats.merge(file_stats(path))
+        return stats
+    # imported here: workers import this module and shouldn't pay for the pool machinery
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    window = IN_FLIGHT_PER_WORKER * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for path in todo:
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+            pending.add(pool.submit(file_stats, path))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stats.merge(future.result())
+    return stats
+
+
+def collect_paths(items):
+    paths = []
+    for item in items:
+        item = Path(item)
+        paths += sorted(item.glob('*.json')) if item.is_dir() else [item]
+    return paths
+
+
+# ---------------------- Render ----------------------
+def plot_aggregate(stats):
+    """Mean / peak maps through plot_feet, plus the load-share histogram and CoG density."""
+    from plot_frame import plot_feet
+    from gui_backend import use_gui_backend
+
+    plot_feet(stats.mean[0], stats.mean[1], layout, title=f"Mean pressure ({stats.count} frames)")
+    plot_feet(stats.peak[0], stats.peak[1], layout, title="Peak pressure")
+
+    plt = use_gui_backend()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 6))
+    ax1.stairs(stats.share_hist, SHARE_BINS)
+    ax1.set_xlabel("Left foot load share")
+    ax1.set_title("Load balance")
+    ax2.imshow(stats.cog_hist.T, origin='upper', cmap='viridis', aspect='equal',
+               extent=(COG_BINS_X[0], COG_BINS_X[-1], COG_BINS_Y[-1], COG_BINS_Y[0]))
+    ax2.set_title("CoG density")
+    plt.show()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregate pressure / CoG statistics over segment files")
+    parser.add_argument('inputs', nargs='+', help="segment .json files or folders")
+    parser.add_argument('--state', help="saved stats (.npz) to update incrementally")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--plot', action='store_true')
+    args = parser.parse_args()
+
+    state = SegmentStats.load(args.state) if args.state and Path(args.state).exists() else None
+    stats = aggregate(collect_paths(args.inputs), stats=state, workers=args.workers)
+    print(f"{len(stats.files)} files, {stats.count} frames")
+    if args.state:
+        stats.save(args.state)
+    if args.plot:
+        plot_aggregate(stats)
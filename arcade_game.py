@@ -1,6 +1,7 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
+
+from layouts import load_layout, cog_from_table
+from scheduler import FixedStepScheduler
 
 """
 Arcade game version of playable soles + CoG
@@ -10,58 +11,34 @@ Arcade game version of playable soles + CoG
 - WASD keys control left foot CoG (W=up, S=down, A=left, D=right)
 - Red dot in right panel shows combined CoG
 - Obstacles fall from top in right panel
-- Score increases each frame survived, displayed in title
+- Score increases each game step survived, displayed in title
+- Obstacles and score advance on a fixed game step (STEP_DT), independent of the draw rate
 """
 
-# Disable conflicting key bindings
-plt.rcParams['keymap.save'] = ''
-plt.rcParams['keymap.fullscreen'] = ''
-plt.rcParams['keymap.home'] = ''
-plt.rcParams['keymap.back'] = ''
-plt.rcParams['keymap.forward'] = ''
-
 # ---------------------- Layout / Indexing ----------------------
-def sole_mask():
-    mask = np.full((13, 4), np.nan)
-    idx = 0
-    for c in range(3): mask[0, c] = idx; idx += 1
-    for r in range(1, 6):
-        for c in range(4): mask[r, c] = idx; idx += 1
-    for r in range(6, 9):
-        for c in range(1, 3): mask[r, c] = idx; idx += 1
-    for r in range(9, 12):
-        for c in range(3): mask[r, c] = idx; idx += 1
-    for c in range(2): mask[12, c] = idx; idx += 1
-    return mask
-
-mask = sole_mask()
-ROWS, COLS = mask.shape
-N = int(np.nanmax(mask)) + 1
+layout = load_layout()
+mask = layout.mask
+WIDTH, HEIGHT = layout.width, layout.height   # sensor area, layout units
+N = layout.n_sensors
 
 # Sensor positions
-rc = np.array([(r,c) for r in range(ROWS) for c in range(COLS) if not np.isnan(mask[r,c])])
-order = np.lexsort((rc[:,1], rc[:,0]))
-rc = rc[order]
-assert len(rc) == N
+rc = layout.rc
 
 # Physical positions (global coordinates) - left foot naturally mirrored
-x_left_phys  = (COLS-1 - rc[:,1]).astype(float)   # left foot X reversed naturally
-y_left_phys  = rc[:,0].astype(float)
-x_right_phys = rc[:,1].astype(float)             # right foot X normal
-y_right_phys = rc[:,0].astype(float)
+x_left_phys, y_left_phys   = layout.positions('left')    # left foot X reversed naturally
+x_right_phys, y_right_phys = layout.positions('right')   # right foot X normal
+COG_TABLE = layout.cog_table(x_left_phys, y_left_phys, x_right_phys, y_right_phys)
 
 FOOT_GAP = 5.0
 SIGMA = 1.4
 AMP = 100.0
 STEP = 0.4
+STEP_DT = 0.05        # fixed game step (s), independent of the render rate
+RENDER_INTERVAL = 16  # ms between render ticks, the display drops frames if it can't keep up
 
 # ---------------------- Helpers ----------------------
 def frame_to_grid(values, left=False):
-    grid = np.full((ROWS, COLS), np.nan)
-    for i, (r,c) in enumerate(rc):
-        cc = int(x_left_phys[i]) if left else int(x_right_phys[i])
-        grid[int(r), cc] = values[i]
-    return grid
+    return layout.frame_to_grid(values, side='left' if left else 'right')
 
 def generate_frame(cx, cy, x_phys, y_phys):
     def blob(x, y):
@@ -71,19 +48,14 @@ def generate_frame(cx, cy, x_phys, y_phys):
     vals = blob(x_phys, y_phys)
     return vals
 
+def clamp(v, lo, hi): return max(lo, min(hi, v))
+
 def compute_cog(left_vals, right_vals):
-    x_world = np.concatenate([x_left_phys, x_right_phys])
-    y_world = np.concatenate([y_left_phys, y_right_phys])
-    vals = np.concatenate([left_vals, right_vals])
-    tot = vals.sum()
-    if tot <= 1e-9: return 0.0, 0.0
-    cx = np.dot(x_world, vals) / tot
-    cy = np.dot(y_world, vals) / tot
-    return cx, cy
+    return cog_from_table(COG_TABLE, left_vals, right_vals)
 
 # ---------------------- Initial blob ----------------------
-left_cx, left_cy = (COLS-1)/2.0, (ROWS-1)/2.0
-right_cx, right_cy = (COLS-1)/2.0, (ROWS-1)/2.0
+left_cx, left_cy = WIDTH/2.0, HEIGHT/2.0
+right_cx, right_cy = WIDTH/2.0, HEIGHT/2.0
 left_vals = generate_frame(left_cx, left_cy, x_left_phys, y_left_phys)
 right_vals = generate_frame(right_cx, right_cy, x_right_phys, y_right_phys)
 cog = compute_cog(left_vals, right_vals)
@@ -95,66 +67,17 @@ spawn_prob = 0.05
 score = 0
 game_over = False
 
-# ---------------------- Plot ----------------------
-fig, (axL, axR, axC) = plt.subplots(1, 3, figsize=(13,5))
-im_left  = axL.imshow(frame_to_grid(left_vals, left=True),  cmap='hot', vmin=0, vmax=AMP)
-axL.set_title('Left Foot');  axL.axis('off')
-im_right = axR.imshow(frame_to_grid(right_vals, left=False), cmap='hot', vmin=0, vmax=AMP)
-axR.set_title('Right Foot'); axR.axis('off')
-
-char, = axC.plot([], [], 'ro', markersize=10)
-axC.set_xlim(-FOOT_GAP-1, COLS-1+FOOT_GAP+1)
-axC.set_ylim(-1, ROWS)
-axC.set_aspect('equal'); axC.grid(True, linestyle='--', alpha=0.3)
-axC.set_title('Character (CoG)')
-char.set_data([cog[0]], [ROWS - cog[1]])
-
-obstacle_patches = []
-
-# ---------------------- Key controls ----------------------
-def clamp(v, lo, hi): return max(lo, min(hi, v))
-
-def on_key(event):
-    global left_cx, left_cy, right_cx, right_cy, left_vals, right_vals, cog
-    if game_over: return
-    # Left foot WASD
-    if event.key == 'w': left_cy -= STEP
-    elif event.key == 's': left_cy += STEP
-    elif event.key == 'a': left_cx -= STEP
-    elif event.key == 'd': left_cx += STEP
-    # Right foot arrows
-    elif event.key == 'up': right_cy -= STEP
-    elif event.key == 'down': right_cy += STEP
-    elif event.key == 'left': right_cx -= STEP
-    elif event.key == 'right': right_cx += STEP
-
-    left_cx = clamp(left_cx, 0.0, COLS-1.0)
-    left_cy = clamp(left_cy, 0.0, ROWS-1.0)
-    right_cx = clamp(right_cx, 0.0, COLS-1.0)
-    right_cy = clamp(right_cy, 0.0, ROWS-1.0)
-
-    left_vals = generate_frame(left_cx, left_cy, x_left_phys, y_left_phys)
-    right_vals = generate_frame(right_cx, right_cy, x_right_phys, y_right_phys)
-    cog = compute_cog(left_vals, right_vals)
-
-    im_left.set_data(frame_to_grid(left_vals, left=True))
-    im_right.set_data(frame_to_grid(right_vals, left=False))
-    char.set_data([cog[0]], [ROWS - cog[1]])
-    fig.canvas.draw_idle()
-
-fig.canvas.mpl_connect('key_press_event', on_key)
-
-# ---------------------- Animation update ----------------------
-def update(frame):
-    global obstacles, score, game_over, cog
+# ---------------------- Game step (state only, no drawing) ----------------------
+def step_game():
+    global obstacles, score, game_over
 
     if game_over:
-        return [char, *obstacle_patches]
+        return
 
     # Spawn obstacles
     if np.random.rand() < spawn_prob:
-        new_x = np.random.uniform(-FOOT_GAP, COLS-1+FOOT_GAP)
-        obstacles.append([new_x, ROWS])
+        new_x = np.random.uniform(-FOOT_GAP, WIDTH+FOOT_GAP)
+        obstacles.append([new_x, HEIGHT+1])
 
     # Move obstacles
     for obs in obstacles:
@@ -163,32 +86,103 @@ def update(frame):
     # Remove offscreen
     obstacles = [o for o in obstacles if o[1] > -1]
 
-    # Remove old patches
-    for patch in obstacle_patches:
-        patch.remove()
-    obstacle_patches.clear()
-
-    # Draw new obstacles
-    for ox, oy in obstacles:
-        patch, = axC.plot([ox], [oy], 'ks', markersize=10)
-        obstacle_patches.append(patch)
-
-    # Update red dot position
-    char.set_data([cog[0]], [ROWS - cog[1]])
-
     # Collision detection
     for ox, oy in obstacles:
-        if np.hypot(cog[0] - ox, (ROWS - cog[1]) - oy) < 0.5:
+        if np.hypot(cog[0] - ox, (HEIGHT+1 - cog[1]) - oy) < 0.5:
             game_over = True
-            axC.set_title(f"GAME OVER! Final Score: {score}", fontsize=14, color='red')
-            return [char, *obstacle_patches]
+            return
 
     # Increase score
     score += 1
-    axC.set_title(f"Score: {score}")
 
-    return [char, *obstacle_patches]
+def main():
+    import matplotlib.animation as animation
+    from gui_backend import use_gui_backend, disable_conflicting_keys
+
+    plt = use_gui_backend()
+    # Disable conflicting key bindings
+    disable_conflicting_keys(plt)
+
+    # ---------------------- Plot ----------------------
+    fig, (axL, axR, axC) = plt.subplots(1, 3, figsize=(13,5))
+    im_left  = axL.imshow(frame_to_grid(left_vals, left=True),  cmap='hot', vmin=0, vmax=AMP)
+    axL.set_title('Left Foot');  axL.axis('off')
+    im_right = axR.imshow(frame_to_grid(right_vals, left=False), cmap='hot', vmin=0, vmax=AMP)
+    axR.set_title('Right Foot'); axR.axis('off')
+
+    char, = axC.plot([], [], 'ro', markersize=10)
+    axC.set_xlim(-FOOT_GAP-1, WIDTH+FOOT_GAP+1)
+    axC.set_ylim(-1, HEIGHT+1)
+    axC.set_aspect('equal'); axC.grid(True, linestyle='--', alpha=0.3)
+    axC.set_title('Character (CoG)')
+    char.set_data([cog[0]], [HEIGHT+1 - cog[1]])
+
+    obstacle_patches = []
+
+    # ---------------------- Key controls ----------------------
+    def on_key(event):
+        global left_cx, left_cy, right_cx, right_cy, left_vals, right_vals, cog
+        if game_over: return
+        # Left foot WASD
+        if event.key == 'w': left_cy -= STEP
+        elif event.key == 's': left_cy += STEP
+        elif event.key == 'a': left_cx -= STEP
+        elif event.key == 'd': left_cx += STEP
+        # Right foot arrows
+        elif event.key == 'up': right_cy -= STEP
+        elif event.key == 'down': right_cy += STEP
+        elif event.key == 'left': right_cx -= STEP
+        elif event.key == 'right': right_cx += STEP
+
+        left_cx = clamp(left_cx, 0.0, WIDTH)
+        left_cy = clamp(left_cy, 0.0, HEIGHT)
+        right_cx = clamp(right_cx, 0.0, WIDTH)
+        right_cy = clamp(right_cy, 0.0, HEIGHT)
+
+        left_vals = generate_frame(left_cx, left_cy, x_left_phys, y_left_phys)
+        right_vals = generate_frame(right_cx, right_cy, x_right_phys, y_right_phys)
+        cog = compute_cog(left_vals, right_vals)
+
+        im_left.set_data(frame_to_grid(left_vals, left=True))
+        im_right.set_data(frame_to_grid(right_vals, left=False))
+        char.set_data([cog[0]], [HEIGHT+1 - cog[1]])
+        fig.canvas.draw_idle()
+
+    fig.canvas.mpl_connect('key_press_event', on_key)
+
+    # ---------------------- Animation update ----------------------
+    sched = FixedStepScheduler(step_game, dt=STEP_DT)
+    fig.canvas.mpl_connect('close_event', lambda ev: print(sched.summary()))
+
+    def update(frame):
+        # run every game step due by wall-clock time, then draw only the latest state
+        if sched.advance() == 0:
+            return [char, *obstacle_patches]
+
+        # Remove old patches
+        for patch in obstacle_patches:
+            patch.remove()
+        obstacle_patches.clear()
+
+        # Draw new obstacles
+        for ox, oy in obstacles:
+            patch, = axC.plot([ox], [oy], 'ks', markersize=10)
+            obstacle_patches.append(patch)
+
+        # Update red dot position
+        char.set_data([cog[0]], [HEIGHT+1 - cog[1]])
+
+        if game_over:
+            axC.set_title(f"GAME OVER! Final Score: {score}", fontsize=14, color='red')
+        else:
+            axC.set_title(f"Score: {score}")
+
+        return [char, *obstacle_patches]
+
+    ani = animation.FuncAnimation(fig, update, interval=RENDER_INTERVAL, blit=False, cache_frame_data=False)
+    plt.tight_layout()
+    plt.show()
+
 
-ani = animation.FuncAnimation(fig, update, interval=50, blit=False)
-plt.tight_layout()
-plt.show()
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,24 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 import random
+import sys
 
-# ---- Disable Matplotlib conflicting keys so 's' won't save ----
-plt.rcParams['keymap.save'] = ''
-plt.rcParams['keymap.fullscreen'] = ''
-plt.rcParams['keymap.home'] = ''
-plt.rcParams['keymap.back'] = ''
-plt.rcParams['keymap.forward'] = ''
-
-# ---- Sensor layout (row-major mask) ----
-def sole_mask():
-    mask = np.full((13, 4), np.nan)
-    idx = 0
-    for c in range(3):
-        mask[0, c] = idx; idx += 1
-    for r in range(1, 6):
-        for c in range(4):
-            mask[r, c] = idx; idx += 1
-    for r in range(6, 9):
-        for c in range(1, 3):
-            mask[r, c] = idx; idx += 1
-    for r in range(9, 12):
-        for c in range(3):
-            mask[r, c] = idx; idx += 1
-    for c in range(2):
-        mask[12, c] = idx; idx += 1
-    return mask
-
-mask = sole_mask()
-ROWS, COLS = mask.shape
-rc = np.array([(r, c) for r in range(ROWS) for c in range(COLS) if not np.isnan(mask[r, c])])
-order = np.lexsort((rc[:, 1], rc[:, 0]))
-rc = rc[order]
-
-# ---- Physical layout (human-like) ----
-hspace = 0.5
-vspace = 0.5
-x_local = (rc[:, 1] - (COLS - 1) / 2.0) * hspace
-y_local = ((ROWS - 1) / 2.0 - rc[:, 0]) * vspace
-
-foot_sep = 4.0
+from cog_predictor import CoGPredictor
+from layouts import load_layout, cog_from_table
+from scheduler import FixedStepScheduler
+from sway_metrics import SwayMetrics
+
+# ---- Sensor layout (row-major, from layouts/<name>.yaml) ----
+layout = load_layout()
+mask = layout.mask
+rc = layout.rc
+
+# ---- Physical layout (human-like): layout coords (spacing applied) centered, y up ----
+FOOT_SCALE = 0.5   # world units per layout unit
+FOOT_GAP = 2.5     # world units between the two sensor areas
+x_local = (layout.coords[:, 0] - layout.width / 2.0) * FOOT_SCALE
+y_local = (layout.height / 2.0 - layout.coords[:, 1]) * FOOT_SCALE
+
+foot_sep = layout.width * FOOT_SCALE + FOOT_GAP
 left_offset = -foot_sep / 2.0
 right_offset = +foot_sep / 2.0
 
@@ -50,6 +27,7 @@ x_left_phys  = x_local + left_offset
 y_left_phys  = y_local.copy()
 x_right_phys = x_local + right_offset
 y_right_phys = y_local.copy()
+COG_TABLE = layout.cog_table(x_left_phys, y_left_phys, x_right_phys, y_right_phys)
 
 # ---- Simulation parameters ----
 SIGMA = 1.4
@@ -61,6 +39,9 @@ DEADZONE = 0.01
 OBSTACLE_SPEED = 0.12
 SPAWN_PROB = 0.08
 COLLIDE_RADIUS = 0.5
+STEP_DT = 0.05      # fixed game step (s), independent of the render rate
+RENDER_INTERVAL = 16  # ms between render ticks, the display drops frames if it can't keep up
+PREDICT_HORIZON = STEP_DT + RENDER_INTERVAL / 1000.0  # CoG lags the player by one sensor period + one render interval
 
 # ---- Helpers ----
 def gaussian_blob(cx, cy, x_phys, y_phys):
@@ -69,15 +50,7 @@ def gaussian_blob(cx, cy, x_phys, y_phys):
     return AMP * np.exp(-(dx*dx + dy*dy) / (2 * SIGMA * SIGMA))
 
 def compute_cog(left_vals, right_vals):
-    x_world = np.concatenate([x_left_phys, x_right_phys])
-    y_world = np.concatenate([y_left_phys, y_right_phys])
-    vals = np.concatenate([left_vals, right_vals])
-    tot = vals.sum()
-    if tot <= 1e-9:
-        return 0.0, 0.0
-    cx = np.dot(x_world, vals) / tot
-    cy = np.dot(y_world, vals) / tot
-    return cx, cy
+    return cog_from_table(COG_TABLE, left_vals, right_vals)
 
 def clamp(v, lo, hi): return max(lo, min(hi, v))
 
@@ -94,34 +67,17 @@ dot_pos = np.array([0.0, 0.0])   # red dot starts at center (0,0)
 obstacles = []
 score = 0
 game_over = False
+sway = SwayMetrics(windows=(20, 100), dt=STEP_DT)   # 1 s and 5 s windows at the 50 ms game step
+HUD_WINDOW = 100
+predictor = CoGPredictor()   # CoG extrapolated to the next frame's display time drives the dot
+pred_x, pred_y = cog_x, cog_y
 
-# ---- Plot setup ----
-fig, (axFeet, axGame) = plt.subplots(1, 2, figsize=(14, 6))
-
+# ---- Plot extents (shared by both display backends) ----
 x_min = min(x_left_phys.min(), x_right_phys.min()) - 1.0
 x_max = max(x_left_phys.max(), x_right_phys.max()) + 1.0
 y_min = y_local.min() - 1.0
 y_max = y_local.max() + 1.0
 
-# Feet plot
-axFeet.set_xlim(x_min, x_max)
-axFeet.set_ylim(y_min, y_max)
-axFeet.set_aspect('equal')
-axFeet.set_title('Feet (blue=left, green=right). Red = CoG')
-left_scatter  = axFeet.scatter(x_left_phys,  y_left_phys,  c=left_vals,  cmap='Blues',  vmin=0, vmax=AMP, s=120, marker='s')
-right_scatter = axFeet.scatter(x_right_phys, y_right_phys, c=right_vals, cmap='Greens', vmin=0, vmax=AMP, s=120, marker='s')
-cog_marker, = axFeet.plot([], [], 'ro', markersize=10)
-axFeet.axhline(0, color='gray', ls='--', lw=0.8)
-axFeet.axvline(0, color='gray', ls='--', lw=0.8)
-
-# Game plot (same extents so dot can reach all)
-axGame.set_xlim(x_min, x_max)
-axGame.set_ylim(y_min, y_max)
-axGame.set_aspect('equal')
-axGame.set_title('Game (red dot) - Score: 0')
-char_marker, = axGame.plot([], [], 'ro', markersize=10)
-obstacles_scatter, = axGame.plot([], [], 'ks', markersize=8)
-
 # ---- Key handling (continuous) ----
 key_state = {'w': False, 'a': False, 's': False, 'd': False,
              'up': False, 'down': False, 'left': False, 'right': False}
@@ -134,26 +90,26 @@ def _normalize_key(ev):
     k = k.replace('arrow ', '')
     return k
 
-def on_key_press(ev):
-    k = _normalize_key(ev)
+def press_key(k):
     if k in key_state:
         key_state[k] = True
 
-def on_key_release(ev):
-    k = _normalize_key(ev)
+def release_key(k):
     if k in key_state:
         key_state[k] = False
 
-fig.canvas.mpl_connect('key_press_event', on_key_press)
-fig.canvas.mpl_connect('key_release_event', on_key_release)
+def on_key_press(ev):
+    press_key(_normalize_key(ev))
+
+def on_key_release(ev):
+    release_key(_normalize_key(ev))
 
-# ---- Animation update ----
-def update(frame):
-    global left_cx, left_cy, right_cx, right_cy, left_vals, right_vals
-    global cog_x, cog_y, dot_pos, obstacles, score, game_over
+# ---- Game step (state only, no drawing) ----
+def step_game():
+    global left_cx, left_cy, right_cx, right_cy
 
     if game_over:
-        return left_scatter, right_scatter, cog_marker, char_marker, obstacles_scatter
+        return
 
     # --- Move foot centers according to keys (intuitive physical directions) ---
     # Left foot controls (WASD)
@@ -183,17 +139,32 @@ def update(frame):
     right_cy = clamp(right_cy, y_min + 0.5, y_max - 0.5)
 
     # --- Recompute sensor intensities (blobs) using centers ---
-    left_vals  = gaussian_blob(left_cx, left_cy, x_left_phys,  y_left_phys)
-    right_vals = gaussian_blob(right_cx, right_cy, x_right_phys, y_right_phys)
-    left_scatter.set_array(left_vals)
-    right_scatter.set_array(right_vals)
+    ingest_frame(gaussian_blob(left_cx, left_cy, x_left_phys,  y_left_phys),
+                 gaussian_blob(right_cx, right_cy, x_right_phys, y_right_phys))
+    update_game()
+
+def ingest_frame(left, right, t=None):
+    """Take one L/R sensor frame (simulated blobs or a real insole sample at time t): CoG, sway, prediction."""
+    global left_vals, right_vals, cog_x, cog_y, pred_x, pred_y
 
+    if t is None:
+        t = sway.count * STEP_DT
+    left_vals, right_vals = left, right
     # --- Compute CoG from sensors (physical coords, no mirroring math) ---
     cog_x, cog_y = compute_cog(left_vals, right_vals)
-    cog_marker.set_data([cog_x], [cog_y])
+    sway.push(cog_x, cog_y, left_vals.sum(), right_vals.sum(), t=t)
+    predictor.update(t, cog_x, cog_y)
+    pred_x, pred_y = predictor.predict(t + PREDICT_HORIZON)
+
+def update_game():
+    """Advance the game one step from the current CoG: red dot, obstacles, collisions, score."""
+    global dot_pos, obstacles, score, game_over
+
+    if game_over:
+        return
 
-    # --- Move red dot toward CoG (boost horizontal effect so lateral movement is noticeable) ---
-    vec = np.array([cog_x, cog_y]) - dot_pos
+    # --- Move red dot toward the predicted CoG (boost horizontal effect so lateral movement is noticeable) ---
+    vec = np.array([pred_x, pred_y]) - dot_pos
     # apply lateral boost (scale X component)
     vec[0] *= LATERAL_BOOST
     dist = np.hypot(vec[0], vec[1])
@@ -213,25 +184,131 @@ def update(frame):
         o[1] -= OBSTACLE_SPEED
     obstacles = [o for o in obstacles if o[1] > (y_min - 1.0)]
 
-    # --- Collision detection ---
+    # --- Collision detection (dot follows the predicted CoG, i.e. where the player is at display time) ---
     collided = any(np.hypot(dot_pos[0] - ox, dot_pos[1] - oy) < COLLIDE_RADIUS for ox, oy in obstacles)
     if collided:
         game_over = True
-        axGame.set_title(f"GAME OVER! Final Score: {score}", color='red')
     else:
         score += 1
-        axGame.set_title(f"Score: {score}   CoG Δ = (x={cog_x:.2f}, y={cog_y:.2f})")
 
-    # --- Update visuals ---
-    char_marker.set_data([dot_pos[0]], [dot_pos[1]])
-    if obstacles:
-        oxs, oys = zip(*obstacles)
-        obstacles_scatter.set_data(oxs, oys)
-    else:
-        obstacles_scatter.set_data([], [])
+def reset_game():
+    global obstacles, score, game_over
+    dot_pos[:] = 0.0
+    obstacles = []
+    score = 0
+    game_over = False
 
-    return left_scatter, right_scatter, cog_marker, char_marker, obstacles_scatter
+def status_text():
+    if game_over:
+        return f"GAME OVER! Final Score: {score}", 'red'
+    m = sway.metrics()[HUD_WINDOW]
+    return (f"Score: {score}   CoG Δ = (x={cog_x:.2f}, y={cog_y:.2f})\n"
+            f"sway: path={m['path_length']:.1f}  RMS={m['rms']:.2f}  area95={m['ellipse_area']:.2f}  "
+            f"v={m['mean_velocity']:.2f}/s  L={m['left_share']:.0%}"), 'black'
+
+# ---- Matplotlib display ----
+def run_matplotlib():
+    import matplotlib.animation as animation
+    from gui_backend import use_gui_backend, disable_conflicting_keys
+
+    plt = use_gui_backend()
+    # ---- Disable Matplotlib conflicting keys so 's' won't save ----
+    disable_conflicting_keys(plt)
+
+    fig, (axFeet, axGame) = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Feet plot
+    axFeet.set_xlim(x_min, x_max)
+    axFeet.set_ylim(y_min, y_max)
+    axFeet.set_aspect('equal')
+    axFeet.set_title('Feet (blue=left, green=right). Red = CoG')
+    left_scatter  = axFeet.scatter(x_left_phys,  y_left_phys,  c=left_vals,  cmap='Blues',  vmin=0, vmax=AMP, s=120, marker='s')
+    right_scatter = axFeet.scatter(x_right_phys, y_right_phys, c=right_vals, cmap='Greens', vmin=0, vmax=AMP, s=120, marker='s')
+    cog_marker, = axFeet.plot([], [], 'ro', markersize=10)
+    axFeet.axhline(0, color='gray', ls='--', lw=0.8)
+    axFeet.axvline(0, color='gray', ls='--', lw=0.8)
+
+    # Game plot (same extents so dot can reach all)
+    axGame.set_xlim(x_min, x_max)
+    axGame.set_ylim(y_min, y_max)
+    axGame.set_aspect('equal')
+    axGame.set_title('Game (red dot) - Score: 0')
+    char_marker, = axGame.plot([], [], 'ro', markersize=10)
+    obstacles_scatter, = axGame.plot([], [], 'ks', markersize=8)
+
+    fig.canvas.mpl_connect('key_press_event', on_key_press)
+    fig.canvas.mpl_connect('key_release_event', on_key_release)
+
+    sched = FixedStepScheduler(step_game, dt=STEP_DT)
+    fig.canvas.mpl_connect('close_event', lambda ev: print(sched.summary() + '\n' + predictor.summary()))
+
+    def update(frame):
+        if game_over:
+            return left_scatter, right_scatter, cog_marker, char_marker, obstacles_scatter
+
+        # run every game step due by wall-clock time, then draw only the latest state
+        if sched.advance() == 0:
+            return left_scatter, right_scatter, cog_marker, char_marker, obstacles_scatter
+
+        # --- Update visuals ---
+        left_scatter.set_array(left_vals)
+        right_scatter.set_array(right_vals)
+        cog_marker.set_data([pred_x], [pred_y])
+        text, color = status_text()
+        axGame.set_title(text, color=color)
+        char_marker.set_data([dot_pos[0]], [dot_pos[1]])
+        if obstacles:
+            oxs, oys = zip(*obstacles)
+            obstacles_scatter.set_data(oxs, oys)
+        else:
+            obstacles_scatter.set_data([], [])
 
-ani = animation.FuncAnimation(fig, update, interval=50, blit=False)
-plt.tight_layout()
-plt.show()
+        return left_scatter, right_scatter, cog_marker, char_marker, obstacles_scatter
+
+    ani = animation.FuncAnimation(fig, update, interval=RENDER_INTERVAL, blit=False, cache_frame_data=False)
+    plt.tight_layout()
+    plt.show()
+    return ani
+
+# ---- Tk canvas display (single RGB buffer, no matplotlib redraw) ----
+def run_tk(width=1120, height=480, interval=RENDER_INTERVAL):
+    from tk_view import TkCanvasView, RED, BLACK
+
+    view = TkCanvasView(width, height, title='VR steps - arcade')
+    half = width // 2
+    feet_panel = view.add_panel((x_min, x_max), (y_min, y_max), (8, 8, half - 16, height - 16))
+    game_panel = view.add_panel((x_min, x_max), (y_min, y_max), (half + 8, 8, half - 16, height - 16))
+    view.add_hline(feet_panel, 0.0)
+    view.add_vline(feet_panel, 0.0)
+    left_hm = view.add_heatmap(feet_panel, x_left_phys, y_left_phys, 0.4, cmap='Blues', vmin=0, vmax=AMP)
+    right_hm = view.add_heatmap(feet_panel, x_right_phys, y_right_phys, 0.4, cmap='Greens', vmin=0, vmax=AMP)
+    view.add_marker('cog', feet_panel, 6, RED)
+    view.add_marker('obstacles', game_panel, 5, BLACK, shape='square')
+    view.add_marker('char', game_panel, 6, RED)
+    view.bind_keys(press_key, release_key)
+    sched = FixedStepScheduler(step_game, dt=STEP_DT)
+
+    def step(frame):
+        sched.advance()
+        view.set_heatmap(left_hm, left_vals)
+        view.set_heatmap(right_hm, right_vals)
+        view.set_marker('cog', [pred_x], [pred_y])
+        view.set_marker('char', [dot_pos[0]], [dot_pos[1]])
+        if obstacles:
+            oxs, oys = zip(*obstacles)
+            view.set_marker('obstacles', oxs, oys)
+        else:
+            view.set_marker('obstacles', [], [])
+        view.set_text(*status_text())
+
+    view.run(step, interval=interval)
+    print(sched.summary())
+    print(predictor.summary())
+
+if __name__ == '__main__':
+    # usage: python arcade_game2.py [matplotlib|tk]
+    display_backend = sys.argv[1] if len(sys.argv) > 1 else 'matplotlib'
+    if display_backend == 'tk':
+        run_tk()
+    else:
+        run_matplotlib()
@@ -0,0 +1,228 @@
+from pathlib import Path
+
+import numpy as np
+
+"""
+Per-sensor calibration of raw L/R pressures
+- offset: per-sensor baseline, the median over frames where that foot is unloaded (0 if it never is,
+  so a cell loaded throughout keeps its signal)
+- gain: 1 for healthy cells, 0 for dead / noisy cells; only estimated from reference loads if given
+- dead mask: cells that never move, or are far noisier than the rest during quiet stand
+- Tables are estimated once per Session/id and cached (memory + .npz folder, .cache/calibration by default)
+- Applying is one fused vectorized op on (T, 40) batches or on a live ring buffer:
+  calibrated = max((raw - offset) * gain, 0)
+"""
+
+QUIET_SECONDS = 1.0      # quiet-stand window length when timestamps are known
+QUIET_SAMPLES = 20       # window length (samples) when they are not
+UNLOADED_FRACTION = 0.05  # foot total within this fraction of its min..max range above the min -> unloaded
+MIN_SWING = 0.5          # the foot only counts as ever unloaded if its total swings by this fraction of its peak
+MIN_UNLOADED = 5         # fewer unloaded frames than this on a foot -> no offset for that foot
+DEAD_RANGE = 1e-6        # max-min below this over the segment -> dead cell
+NOISE_Z = 6.0            # robust z-score of quiet-stand std above this -> noisy cell
+LOADED_FRACTION = 0.05   # cells above this fraction of the foot's peak quiet-stand load are "loaded"
+MIN_LOADED = 3           # fewer loaded cells than this on a foot -> no noise test for that foot
+MAD_FLOOR = 0.01         # MAD floor as a fraction of the median loaded-cell signal
+GAIN_LIMITS = (0.25, 4.0)
+CACHE_DIR = Path(__file__).parent.joinpath('.cache', 'calibration')
+
+
+class Calibration:
+    """Offset / gain / dead tables for both feet, each shaped (2, N) with row 0 = L, row 1 = R."""
+
+    def __init__(self, offset, gain, dead, quiet=None):
+        self.offset = np.asarray(offset, dtype=float)
+        self.gain = np.asarray(gain, dtype=float)
+        self.dead = np.asarray(dead, dtype=bool)
+        self.quiet = quiet  # (start, stop) sample slice used for estimation
+
+    @classmethod
+    def identity(cls, n_sensors=40):
+        return cls(np.zeros((2, n_sensors)), np.ones((2, n_sensors)), np.zeros((2, n_sensors), dtype=bool))
+
+    def apply(self, left, right, out_left=None, out_right=None):
+        """Calibrate a frame (N,) or a batch (T, N) of each foot. Dead cells come out as 0."""
+        left = np.subtract(left, self.offset[0], out=out_left)
+        right = np.subtract(right, self.offset[1], out=out_right)
+        np.multiply(left, self.gain[0], out=left)
+        np.multiply(right, self.gain[1], out=right)
+        np.maximum(left, 0.0, out=left)
+        np.maximum(right, 0.0, out=right)
+        return left, right
+
+    def apply_stacked(self, frames, out=None):
+        """Calibrate an array shaped (..., 2, N) (L then R) in one op, e.g. a ring buffer."""
+        out = np.subtract(frames, self.offset, out=out)
+        np.multiply(out, self.gain, out=out)
+        return np.maximum(out, 0.0, out=out)
+
+    def save(self, path):
+        quiet = np.array(self.quiet if self.quiet is not None else (-1, -1))
+        np.savez(path, offset=self.offset, gain=self.gain, dead=self.dead, quiet=quiet)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            quiet = tuple(int(q) for q in f['quiet'])
+            return cls(f['offset'], f['gain'], f['dead'], quiet=None if quiet[0] < 0 else quiet)
+
+
+# ---------------------- Estimation ----------------------
+def find_quiet_window(left, right, t=None, window=None):
+    """(start, stop) of the loaded window with the steadiest total load (rolling std via cumsums)."""
+    total = left.sum(axis=1) + right.sum(axis=1)
+    n = len(total)
+    if window is None:
+        if t is not None and n > 1:
+            dt = np.median(np.diff(np.asarray(t, dtype=float)))  # t is validated: sorted, unique
+            window = int(round(QUIET_SECONDS / dt)) if dt > 0 else QUIET_SAMPLES
+        else:
+            window = QUIET_SAMPLES
+    window = int(np.clip(window, 2, n))
+
+    c1 = np.concatenate([[0.0], np.cumsum(total)])
+    c2 = np.concatenate([[0.0], np.cumsum(total * total)])
+    mean = (c1[window:] - c1[:-window]) / window
+    var = np.maximum((c2[window:] - c2[:-window]) / window - mean * mean, 0.0)
+
+    # only consider windows where the person is actually standing on the insoles
+    loaded = mean >= 0.5 * mean.max()
+    score = np.where(loaded, np.sqrt(var) / np.maximum(mean, 1e-9), np.inf)
+    start = int(np.argmin(score))
+    return start, start + window
+
+
+def estimate_calibration(left, right, t=None, quiet=None, reference=None):
+    """
+    Estimate a Calibration from one segment.
+    left, right: (T, N) raw values. quiet: optional (start, stop) quiet-stand slice.
+    reference: optional (2, N) expected quiet-stand loads (e.g. from a flat-plate test) used for gains.
+    Without it gains are not estimated: every healthy cell keeps gain 1.
+    """
+    raw = np.stack([np.asarray(left, dtype=float), np.asarray(right, dtype=float)], axis=1)  # (T, 2, N)
+    if quiet is None:
+        quiet = find_quiet_window(raw[:, 0], raw[:, 1], t=t)
+    start, stop = quiet
+
+    # baseline only from frames where the foot is off the insole: a low percentile over the whole
+    # segment would take most of the load of a cell that is pressed throughout
+    offset = np.zeros(raw.shape[1:])
+    totals = raw.sum(axis=2)  # (T, 2)
+    for foot in range(2):
+        lo, hi = totals[:, foot].min(), totals[:, foot].max()
+        if hi - lo < MIN_SWING * max(hi, 0.0):
+            continue  # never stepped off: no unloaded frames to take the baseline from
+        unloaded = totals[:, foot] - lo <= UNLOADED_FRACTION * (hi - lo)
+        if np.count_nonzero(unloaded) >= MIN_UNLOADED:
+            offset[foot] = np.median(raw[unloaded, foot], axis=0)
+    dead = (raw.max(axis=0) - raw.min(axis=0)) <= DEAD_RANGE
+
+    # noisy cells: quiet-stand std far above that of the loaded cells (robust z-score per foot).
+    # Unloaded cells sit at a constant 0 and would drag median / MAD to 0, so they are left out.
+    std = raw[start:stop].std(axis=0)
+    level = raw[start:stop].mean(axis=0)
+    for foot in range(2):
+        loaded = level[foot] > LOADED_FRACTION * max(level[foot].max(), 0.0)
+        if np.count_nonzero(loaded) < MIN_LOADED:
+            continue
+        med = np.median(std[foot, loaded])
+        mad = 1.4826 * np.median(np.abs(std[foot, loaded] - med))
+        floor = MAD_FLOOR * np.median(level[foot, loaded])
+        dead[foot] |= (std[foot] - med) > NOISE_Z * max(mad, floor, 1e-9)
+
+    gain = np.ones_like(offset)
+    if reference is not None:
+        quiet_mean = level - offset
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gain = np.where(quiet_mean > 0, np.asarray(reference, dtype=float) / quiet_mean, 1.0)
+        gain = np.clip(gain, *GAIN_LIMITS)
+    gain[dead] = 0.0
+
+    return Calibration(offset, gain, dead, quiet=(int(start), int(stop)))
+
+
+# ---------------------- Cache (per Session / id) ----------------------
+class CalibrationCache:
+    """Calibration tables keyed by (Session, id). Persisted as .npz files when a folder is given (None: memory only)."""
+
+    def __init__(self, folder=None):
+        self.folder = Path(folder) if folder is not None else None
+        self._tables = {}
+
+    def _path(self, key):
+        name = '_'.join(str(k) for k in key)
+        name = ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in name)
+        return self.folder.joinpath(f"calibration_{name}.npz")
+
+    def get(self, key):
+        if key in self._tables:
+            return self._tables[key]
+        if self.folder is not None and self._path(key).exists():
+            self._tables[key] = Calibration.load(self._path(key))
+            return self._tables[key]
+        return None
+
+    def put(self, key, calibration):
+        self._tables[key] = calibration
+        if self.folder is not None:
+            try:
+                self.folder.mkdir(parents=True, exist_ok=True)
+                calibration.save(self._path(key))
+            except OSError:
+                pass  # read-only install: keep it in memory, estimate again next run
+
+    def get_or_estimate(self, key, left, right, t=None, **kwargs):
+        calibration = self.get(key)
+        if calibration is None:
+            calibration = estimate_calibration(left, right, t=t, **kwargs)
+            self.put(key, calibration)
+        return calibration
+
+
+default_cache = CalibrationCache(CACHE_DIR)
+
+
+def session_key(data):
+    """(Session, id) of a loaded segment (list of sample dicts)."""
+    return data[0].get("Session"), data[0].get("id")
+
+
+def calibrate_segment(data, left, right, t=None, cache=None):
+    """Calibrated copies of (left, right) for a loaded segment, estimating the table once per session."""
+    cache = default_cache if cache is None else cache
+    calibration = cache.get_or_estimate(session_key(data), left, right, t=t)
+    return calibration.apply(left, right)
+
+
+# ---------------------- Live ring buffer ----------------------
+class CalibratedRing:
+    """Fixed-capacity ring of calibrated frames, shaped (capacity, 2, N). push() calibrates in place."""
+
+    def __init__(self, calibration, capacity=256):
+        self.calibration = calibration
+        n_sensors = calibration.offset.shape[1]
+        self.frames = np.zeros((capacity, 2, n_sensors))
+        self.capacity = capacity
+        self.count = 0
+
+    def push(self, left, right):
+        slot = self.frames[self.count % self.capacity]
+        slot[0] = left
+        slot[1] = right
+        self.calibration.apply_stacked(slot, out=slot)
+        self.count += 1
+        return slot
+
+    def push_block(self, left, right):
+        """Push a (T, N) block of each foot with one calibration op over the whole block."""
+        block = np.stack([left, right], axis=1)
+        self.calibration.apply_stacked(block, out=block)
+        idx = (self.count + np.arange(len(block))) % self.capacity
+        self.frames[idx] = block
+        self.count += len(block)
+
+    def latest(self, n=1):
+        """Last n frames, oldest first, as (n, 2, N)."""
+        n = min(n, self.count, self.capacity)
+        idx = (self.count - n + np.arange(n)) % self.capacity
+        return self.frames[idx]
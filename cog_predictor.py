@@ -0,0 +1,163 @@
+from collections import deque
+
+import numpy as np
+
+"""
+Predictive CoG: extrapolate the sensor CoG to the time the next frame is displayed
+- alpha-beta-gamma tracker (x and y together): position, velocity and acceleration are updated
+  in O(1) per sample, irregular sample spacing is handled through each sample's dt
+- predict(t_display) = p + v h + a h^2 / 2, with the lead (prediction - last sample) clamped to a
+  confidence bound: CONF_SIGMAS x the recent RMS CoG speed over the horizon, at most MAX_LEAD
+- every prediction is checked against the real CoG at its target time once a later sample
+  arrives (interpolated between the two bracketing samples), next to the hold-last-sample
+  baseline, giving running error stats and a bounded log of error rows
+- evaluate_segment() replays a recorded (t, cog) stream through the same code for offline tuning
+- usage: python cog_predictor.py [segment.json] [--horizon 0.066]  (grid search of the gains)
+"""
+
+ALPHA = 0.5         # position gain
+BETA = 0.3          # velocity gain
+GAMMA = 0.01        # acceleration gain
+CONF_SIGMAS = 2.0   # lead bound in RMS-speed x horizon units
+MAX_LEAD = 1.0      # hard cap on the lead (CoG units)
+SPEED_DECAY = 0.1   # EW weight of the newest sample in the RMS speed
+LOG_SIZE = 4096     # error rows kept for offline inspection
+
+
+class CoGPredictor:
+    """Feed update(t, x, y) per sensor sample, ask predict(t_display) once per frame."""
+
+    def __init__(self, alpha=ALPHA, beta=BETA, gamma=GAMMA, conf_sigmas=CONF_SIGMAS, max_lead=MAX_LEAD,
+                 log_size=LOG_SIZE):
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.conf_sigmas = conf_sigmas
+        self.max_lead = max_lead
+        self.pos = np.zeros(2)
+        self.vel = np.zeros(2)
+        self.acc = np.zeros(2)
+        self.speed_ms = 0.0       # EW mean squared speed of the raw samples
+        self.t = None
+        self.last = np.zeros(2)   # last raw sample
+        self.count = 0
+        self._pending = deque(maxlen=64)  # (target t, predicted xy, held xy, horizon)
+        # error stats: [n, sum, sum of squares, max] for the prediction and the hold baseline
+        self._err = np.zeros((2, 4))
+        self.log = np.full((log_size, 4), np.nan)  # target t, horizon, prediction error, hold error
+        self._logged = 0
+
+    def update(self, t, x, y):
+        z = np.array([x, y], dtype=float)
+        if self.t is None:
+            self.pos[:] = z
+        else:
+            dt = t - self.t
+            if dt <= 0:
+                return
+            self._score(t, z)
+            step = z - self.last
+            self.speed_ms += SPEED_DECAY * (float(step @ step) / (dt * dt) - self.speed_ms)
+            pred = self.pos + self.vel * dt + 0.5 * self.acc * dt * dt
+            r = z - pred
+            self.pos = pred + self.alpha * r
+            self.vel = self.vel + self.acc * dt + (self.beta / dt) * r
+            self.acc = self.acc + (2.0 * self.gamma / (dt * dt)) * r
+        self.t = t
+        self.last = z
+        self.count += 1
+
+    def predict(self, t_display):
+        """Predicted (x, y) at t_display, falling back to the last sample before two samples arrived."""
+        if self.count < 2:
+            return float(self.last[0]), float(self.last[1])
+        h = max(t_display - self.t, 0.0)
+        lead = self.pos + self.vel * h + 0.5 * self.acc * h * h - self.last
+        bound = min(self.conf_sigmas * np.sqrt(self.speed_ms) * h, self.max_lead)
+        norm = np.hypot(lead[0], lead[1])
+        if norm > bound:
+            lead *= bound / norm
+        out = self.last + lead
+        self._pending.append((t_display, out, self.last.copy(), h))
+        return float(out[0]), float(out[1])
+
+    def _score(self, t, z):
+        """Score pending predictions whose target time lies in (self.t, t]."""
+        while self._pending and self._pending[0][0] <= t:
+            target, pred, held, h = self._pending.popleft()
+            frac = min(max((target - self.t) / (t - self.t), 0.0), 1.0)
+            actual = self.last + frac * (z - self.last)
+            errs = (np.hypot(*(pred - actual)), np.hypot(*(held - actual)))
+            for row, e in zip(self._err, errs):
+                row[0] += 1
+                row[1] += e
+                row[2] += e * e
+                row[3] = max(row[3], e)
+            self.log[self._logged % len(self.log)] = (target, h, errs[0], errs[1])
+            self._logged += 1
+
+    def stats(self):
+        """Mean / RMS / max error of the predictions and of holding the last sample."""
+        out = {'n': int(self._err[0, 0])}
+        for name, (n, s, ss, mx) in zip(('pred', 'hold'), self._err):
+            n = max(n, 1)
+            out[f'{name}_mean'] = s / n
+            out[f'{name}_rms'] = np.sqrt(ss / n)
+            out[f'{name}_max'] = mx
+        return out
+
+    def summary(self):
+        s = self.stats()
+        return (f"CoG prediction over {s['n']} frames: rms {s['pred_rms']:.3f} (hold {s['hold_rms']:.3f}), "
+                f"max {s['pred_max']:.3f} (hold {s['hold_max']:.3f})")
+
+    def errors(self):
+        """Logged error rows, oldest first: target t, horizon, prediction error, hold error."""
+        n = min(self._logged, len(self.log))
+        idx = (self._logged - n + np.arange(n)) % len(self.log)
+        return self.log[idx]
+
+
+def evaluate_segment(t, cog, horizon, **params):
+    """Replay a recorded (T,) t / (T, 2) cog stream, predicting `horizon` s past every sample. Returns stats()."""
+    predictor = CoGPredictor(**params)
+    for ti, (x, y) in zip(np.asarray(t, dtype=float), np.asarray(cog, dtype=float)):
+        predictor.update(ti, x, y)
+        predictor.predict(ti + horizon)
+    return predictor.stats()
+
+
+if __name__ == '__main__':
+    import argparse
+    import itertools
+
+    import arcade_game2 as game
+    from layouts import cog_from_table
+
+    parser = argparse.ArgumentParser(description="Tune the CoG predictor gains on a recorded segment")
+    parser.add_argument('segment', nargs='?', help="segment .json (default: noisy synthetic sway)")
+    parser.add_argument('--horizon', type=float, default=game.PREDICT_HORIZON, help="prediction horizon (s)")
+    args = parser.parse_args()
+
+    if args.segment:
+        from json_utils import load_json
+        from validation import validate_segment, format_report
+
+        t, left, right, report = validate_segment(load_json(args.segment), n_sensors=game.layout.n_sensors)
+        print(format_report(report))
+    else:
+        from latency_harness import synthetic_frames
+
+        left, right = synthetic_frames(rate_hz=1.0 / game.STEP_DT)
+        left = np.tile(left, (5, 1)) * np.random.default_rng(0).uniform(0.9, 1.1, (5 * len(left), 1))
+        right = np.tile(right, (5, 1))
+        t = np.arange(len(left)) * game.STEP_DT
+    cog = cog_from_table(game.COG_TABLE, left, right)
+
+    rows = []
+    for alpha, beta, gamma in itertools.product((0.3, 0.5, 0.7, 0.9), (0.05, 0.1, 0.3, 0.5), (0.0, 0.01, 0.05, 0.1)):
+        s = evaluate_segment(t, cog, args.horizon, alpha=alpha, beta=beta, gamma=gamma)
+        rows.append((s['pred_rms'], alpha, beta, gamma, s))
+    rows.sort(key=lambda r: r[0])
+    print(f"horizon {args.horizon * 1e3:.0f} ms, hold-last-sample rms {rows[0][4]['hold_rms']:.4f}")
+    print(f"{'alpha':>6}{'beta':>6}{'gamma':>6}{'rms':>9}{'max':>9}")
+    for rms, alpha, beta, gamma, s in rows[:10]:
+        print(f"{alpha:6.2f}{beta:6.2f}{gamma:6.2f}{rms:9.4f}{s['pred_max']:9.4f}")
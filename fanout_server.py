@@ -0,0 +1,272 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+"""
+Local publish/subscribe fan-out of L/R frames + CoG over localhost TCP
+- The acquisition side calls FanoutServer.publish(); it only encodes the frame once and hands
+  it to the server's event loop thread, it never waits on a subscriber
+- Every subscriber has a bounded queue with latest-wins dropping (oldest frames go first),
+  so one slow consumer (logger, therapist's monitor) can't stall the game or acquisition
+- Flow control: the client acks each frame's seq once it has consumed it, and the server keeps at
+  most MAX_IN_FLIGHT unacked frames per subscriber; the backlog therefore waits in the latest-wins
+  queue (where it gets dropped) instead of in socket buffers (where it would arrive stale)
+- Per-subscriber metrics from the acks: consumed / dropped frames, sequence lag of what the
+  subscriber has actually read, publish->ack latency
+- Wire format (little endian), each message length-prefixed with a uint32:
+  seq uint32 | t float64 | cog_x float32 | cog_y float32 | n uint16 | L float32[n] | R float32[n]
+  acks (client -> server): seq uint32
+- usage: python fanout_server.py  (runs a loopback demo with a fast and a slow subscriber)
+"""
+
+HOST = '127.0.0.1'
+PORT = 8765
+QUEUE_SIZE = 8
+MAX_IN_FLIGHT = 1  # frames sent but not yet acked by the subscriber
+
+_LEN = struct.Struct('<I')
+_ACK = struct.Struct('<I')
+_HEADER = struct.Struct('<IdffH')
+
+
+# ---------------------- Encoding ----------------------
+def encode_frame(seq, t, left, right, cog):
+    left = np.asarray(left, dtype='<f4')
+    right = np.asarray(right, dtype='<f4')
+    body = _HEADER.pack(seq & 0xFFFFFFFF, t, cog[0], cog[1], len(left)) + left.tobytes() + right.tobytes()
+    return _LEN.pack(len(body)) + body
+
+
+def decode_frame(body):
+    """(seq, t, left, right, (cog_x, cog_y)) from a message body (without the length prefix)."""
+    seq, t, cx, cy, n = _HEADER.unpack_from(body)
+    vals = np.frombuffer(body, dtype='<f4', count=2 * n, offset=_HEADER.size)
+    return seq, t, vals[:n], vals[n:], (cx, cy)
+
+
+# ---------------------- Server ----------------------
+class _Subscriber:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.peer = writer.get_extra_info('peername')
+        self.queue = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.in_flight = deque()  # (seq, publish stamp) sent, not acked yet
+        self.closed = False
+        self.sent = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.last_seq = None      # last seq the subscriber acked (has read)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def offer(self, seq, stamp, message):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1  # deque drops the oldest frame: latest wins
+        self.queue.append((seq, stamp, message))
+        self.ready.set()
+
+
+class FanoutServer:
+    """Runs an asyncio TCP server in a background thread. publish() is safe to call from any thread."""
+
+    def __init__(self, host=HOST, port=PORT, queue_size=QUEUE_SIZE):
+        self.host, self.port = host, port
+        self.queue_size = queue_size
+        self.subscribers = []
+        self.published = 0
+        self.last_seq = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+
+    # ---- Lifecycle ----
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='fanout-server', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port))
+        # port 0 -> pick the actual port
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # subscriber handlers close their writers when cancelled
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sub = _Subscriber(writer, self.queue_size)
+        self.subscribers.append(sub)
+        acks = asyncio.ensure_future(self._read_acks(reader, sub))
+        try:
+            while not sub.closed:
+                await sub.ready.wait()
+                sub.ready.clear()
+                while sub.queue and len(sub.in_flight) < MAX_IN_FLIGHT:
+                    seq, stamp, message = sub.queue.popleft()
+                    sub.in_flight.append((seq, stamp))
+                    sub.sent += 1
+                    writer.write(message)
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            acks.cancel()
+            self.subscribers.remove(sub)
+            writer.close()
+
+    async def _read_acks(self, reader, sub):
+        """Consumed-frame acks from the client: free in-flight slots and record what it has read."""
+        try:
+            while True:
+                (seq,) = _ACK.unpack(await reader.readexactly(_ACK.size))
+                now = time.perf_counter()
+                while sub.in_flight:
+                    sent_seq, stamp = sub.in_flight.popleft()
+                    if sent_seq == seq:
+                        latency = now - stamp
+                        sub.consumed += 1
+                        sub.last_seq = seq
+                        sub.latency_sum += latency
+                        sub.latency_max = max(sub.latency_max, latency)
+                        break
+                sub.ready.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            sub.closed = True
+            sub.ready.set()
+
+    # ---- Producer side ----
+    def publish(self, seq, t, left, right, cog):
+        """Encode once and fan out. Never blocks on subscribers."""
+        message = encode_frame(seq, t, left, right, cog)
+        stamp = time.perf_counter()
+        self.published += 1
+        self.last_seq = seq
+        self._loop.call_soon_threadsafe(self._fan_out, seq, stamp, message)
+
+    def _fan_out(self, seq, stamp, message):
+        for sub in self.subscribers:
+            sub.offer(seq, stamp, message)
+
+    # ---- Metrics ----
+    def stats(self):
+        """Per-subscriber metrics: sent / consumed / dropped, seq lag of the last read frame, publish->ack latency (ms)."""
+        out = []
+        for sub in list(self.subscribers):
+            lag = 0 if sub.last_seq is None or self.last_seq is None else self.last_seq - sub.last_seq
+            out.append({
+                'peer': sub.peer,
+                'sent': sub.sent,
+                'consumed': sub.consumed,
+                'dropped': sub.dropped,
+                'queued': len(sub.queue),
+                'in_flight': len(sub.in_flight),
+                'lag_frames': lag,
+                'latency_ms_mean': 1e3 * sub.latency_sum / sub.consumed if sub.consumed else 0.0,
+                'latency_ms_max': 1e3 * sub.latency_max,
+            })
+        return out
+
+
+# ---------------------- Client ----------------------
+def _read_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+def subscribe(host=HOST, port=PORT):
+    """
+    Generator of decoded frames (seq, t, left, right, cog) from a FanoutServer.
+    A frame is acked when the next one is requested, i.e. once the caller has consumed it.
+    """
+    with socket.create_connection((host, port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            (size,) = _LEN.unpack(_read_exact(sock, _LEN.size))
+            frame = decode_frame(_read_exact(sock, size))
+            yield frame
+            sock.sendall(_ACK.pack(frame[0]))
+
+
+def loopback_client(host=HOST, port=PORT, n_frames=100, delay=0.0, results=None):
+    """Test client: read n_frames (sleeping `delay` s per frame to act slow), report seq gaps."""
+    seqs = []
+    for seq, t, left, right, cog in subscribe(host, port):
+        seqs.append(seq)
+        if delay:
+            time.sleep(delay)
+        if len(seqs) >= n_frames:
+            break
+    report = {'received': len(seqs), 'first_seq': seqs[0], 'last_seq': seqs[-1],
+              'skipped': int(np.sum(np.diff(seqs) - 1)) if len(seqs) > 1 else 0}
+    if results is not None:
+        results.append(report)
+    return report
+
+
+if __name__ == '__main__':
+    from arcade_game2 import compute_cog, gaussian_blob, x_left_phys, y_left_phys, x_right_phys, y_right_phys
+
+    rate = 100.0
+    with FanoutServer(port=0) as server:
+        results = []
+        clients = [threading.Thread(target=loopback_client, args=(HOST, server.port, 300, 0.0, results)),
+                   threading.Thread(target=loopback_client, args=(HOST, server.port, 120, 0.025, results))]
+        for c in clients:
+            c.start()
+        while len(server.subscribers) < len(clients):
+            time.sleep(0.01)
+
+        t0 = time.perf_counter()
+        for seq in range(400):
+            phase = 2 * np.pi * seq / 200
+            left = gaussian_blob(-2.0 + np.cos(phase), np.sin(phase), x_left_phys, y_left_phys)
+            right = gaussian_blob(2.0 + np.cos(phase), np.sin(phase), x_right_phys, y_right_phys)
+            server.publish(seq, time.perf_counter() - t0, left, right, compute_cog(left, right))
+            time.sleep(1.0 / rate)
+            if seq % 100 == 99:
+                for s in server.stats():
+                    print(s)
+        for c in clients:
+            c.join(timeout=5.0)
+        for r in results:
+            print(r)
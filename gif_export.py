@@ -0,0 +1,224 @@
+import io
+
+import numpy as np
+
+"""
+Fast GIF export for animate_feet
+- The figure (axes, colorbar, titles) is rendered once with Agg and quantized once;
+  only the sensor squares change between frames
+- One global 256-color palette: BG_COLORS for the static background + the colormap levels,
+  frames are composed directly as palette indices (no per-frame quantization)
+- Identical consecutive frames (same quantized sensor levels) are merged into one longer frame;
+  Pillow then stores each remaining frame as the cropped region that changed since the previous one
+- Only the (T, 2, N) sensor levels are kept for the whole segment; each worker composes the full
+  images of its own CHUNK_FRAMES-frame chunk, encodes it as a GIF stream, and the streams are
+  spliced into the file as they arrive, so peak memory is ~CHUNK_FRAMES x workers images
+- Per-frame title text is static here ("Name: ..."), the frame counter is not drawn
+"""
+
+BG_COLORS = 64
+CMAP_LEVELS = 256 - BG_COLORS
+CHUNK_FRAMES = 64
+
+
+# ---------------------- Static layout ----------------------
+def _render_layout(layout, name, cmap, vmin, vmax, figsize=(8, 12), dpi=100, marker_size=500):
+    """Background RGB (H, W, 3) plus per-foot flat pixel indices / owner sensor of each square."""
+    from matplotlib.colors import Normalize
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    axes = fig.subplots(1, 2)
+    norm = Normalize(vmin=vmin, vmax=vmax)
+    feet = (layout.positions('left'), layout.positions('right'))
+    scatters = []
+    for ax, (xs, ys), title in zip(axes, feet, ("Left Foot", "Right Foot")):
+        sc = ax.scatter(xs, ys, c=np.zeros(layout.n_sensors), cmap=cmap, norm=norm, s=marker_size, marker='s')
+        ax.set_title(title)
+        ax.invert_yaxis()
+        ax.axis('equal')
+        scatters.append(sc)
+    cbar = fig.colorbar(scatters[0], ax=axes, orientation='horizontal', fraction=0.05)
+    cbar.set_label("Sensor Value")
+    fig.suptitle(f"Name: {name}")
+
+    # final layout first, then read square positions and hide them for the background
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    half = int(round(np.sqrt(marker_size) * dpi / 72.0 / 2.0))
+    offs = np.arange(-half, half)
+    dy, dx = np.meshgrid(offs, offs, indexing='ij')
+    squares = []
+    for ax, (xs, ys) in zip(axes, feet):
+        disp = ax.transData.transform(np.column_stack([xs, ys]))
+        px = np.round(disp[:, 0]).astype(np.intp)
+        py = np.round(height - disp[:, 1]).astype(np.intp)
+        cx = (px[:, None] + dx.ravel()[None, :]).ravel()
+        cy = (py[:, None] + dy.ravel()[None, :]).ravel()
+        owner = np.repeat(np.arange(layout.n_sensors), dx.size)
+        keep = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+        squares.append((cy[keep] * width + cx[keep], owner[keep]))
+
+    for sc in scatters:
+        sc.set_visible(False)
+    canvas.draw()
+    background = np.asarray(canvas.buffer_rgba())[..., :3].copy()
+    return background, squares
+
+
+def _build_palette(background, cmap):
+    """Global palette (768,) and the background as palette indices."""
+    from matplotlib import colormaps
+    from PIL import Image
+
+    bg = Image.fromarray(background).quantize(colors=BG_COLORS, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    bg_palette = np.zeros((BG_COLORS, 3), dtype=np.uint8)
+    used = np.asarray(bg.getpalette()[:3 * BG_COLORS], dtype=np.uint8).reshape(-1, 3)
+    bg_palette[:len(used)] = used
+    levels = (colormaps[cmap](np.linspace(0.0, 1.0, CMAP_LEVELS))[:, :3] * 255).round().astype(np.uint8)
+    palette = np.concatenate([bg_palette, levels]).ravel()
+    # re-map the background onto the full palette so the colorbar uses the colormap levels
+    pal_im = Image.new('P', (1, 1))
+    pal_im.putpalette(palette.tobytes())
+    bg = Image.fromarray(background).quantize(palette=pal_im, dither=Image.Dither.NONE)
+    return palette, np.asarray(bg, dtype=np.uint8)
+
+
+# ---------------------- Frames ----------------------
+def frame_levels(left_data, right_data, vmin, vmax):
+    """(T, 2, N) uint8 palette index of every sensor square (L then R)."""
+    span = (vmax - vmin) or 1.0
+    data = np.stack([np.asarray(left_data, dtype=float), np.asarray(right_data, dtype=float)], axis=1)
+    level = np.clip((data - vmin) / span * (CMAP_LEVELS - 1), 0, CMAP_LEVELS - 1)
+    return level.round().astype(np.uint8) + BG_COLORS
+
+
+def compose_frames(levels, bg_index, squares):
+    """(T, H, W) uint8 palette-index frames, composed from the background with fancy indexing."""
+    frames = np.empty((len(levels),) + bg_index.shape, dtype=np.uint8)
+    flat = frames.reshape(len(frames), -1)
+    flat[:] = bg_index.ravel()
+    for foot, (pix, owner) in enumerate(squares):
+        flat[:, pix] = levels[:, foot, owner]
+    return frames
+
+
+def dedupe_levels(levels, duration_ms):
+    """
+    Drop frames whose sensor levels equal their predecessor's (the composed images are then identical).
+    Returns (kept levels, per-frame durations).
+    """
+    flat = levels.reshape(len(levels), -1)
+    same = np.zeros(len(levels), dtype=bool)
+    same[1:] = (flat[1:] == flat[:-1]).all(axis=1)
+    keep = np.flatnonzero(~same)
+    # each kept frame lasts until the next kept frame
+    counts = np.diff(np.append(keep, len(levels)))
+    return levels[keep], (counts * duration_ms).tolist()
+
+
+# ---------------------- Encoding ----------------------
+_layout = {}  # background / squares / palette of the export running in this process
+
+
+def _init_layout(bg_index, squares, palette):
+    """Pool initializer: the static layout reaches each worker once, jobs only carry sensor levels."""
+    _layout.update(bg_index=bg_index, squares=squares, palette=palette)
+
+
+def _encode_chunk(levels, durations, loop=0):
+    """Compose and encode one chunk of frames as a complete GIF stream."""
+    from PIL import Image
+
+    palette = _layout['palette']
+    frames = compose_frames(levels, _layout['bg_index'], _layout['squares'])
+    height, width = frames.shape[1:]
+    images = []
+    for f in frames:
+        im = Image.frombytes('P', (width, height), f.tobytes())
+        im.putpalette(palette.tobytes())
+        images.append(im)
+    buf = io.BytesIO()
+    images[0].save(buf, format='GIF', save_all=True, append_images=images[1:], duration=durations,
+                   loop=loop, optimize=False, disposal=1)
+    return buf.getvalue()
+
+
+def _split_gif(data):
+    """(header incl. global palette + app extensions, frame blocks) of a GIF stream."""
+    flags = data[10]
+    pos = 13 + (3 * 2 ** ((flags & 7) + 1) if flags & 0x80 else 0)
+    header_end = None
+    while True:
+        block = data[pos]
+        if block == 0x3B:  # trailer
+            break
+        if block == 0x21:
+            label = data[pos + 1]
+            if label == 0xF9 and header_end is None:
+                header_end = pos
+            p = pos + 2
+            while data[p]:
+                p += data[p] + 1
+            pos = p + 1
+        elif block == 0x2C:
+            if header_end is None:
+                header_end = pos
+            packed = data[pos + 9]
+            p = pos + 10 + (3 * 2 ** ((packed & 7) + 1) if packed & 0x80 else 0)
+            p += 1  # LZW minimum code size
+            while data[p]:
+                p += data[p] + 1
+            pos = p + 1
+        else:
+            raise ValueError(f"unexpected GIF block 0x{block:02x} at {pos}")
+    return data[:header_end], data[header_end:pos]
+
+
+def splice_gifs(chunks):
+    """Join GIF streams that share screen size and global palette into one animation."""
+    header, frames = _split_gif(chunks[0])
+    parts = [header, frames]
+    for chunk in chunks[1:]:
+        parts.append(_split_gif(chunk)[1])
+    parts.append(b'\x3B')
+    return b''.join(parts)
+
+
+def _write_chunks(f, chunks):
+    """Splice GIF streams (in order) into an open file as they arrive, see splice_gifs."""
+    for i, chunk in enumerate(chunks):
+        header, frames = _split_gif(chunk)
+        if i == 0:
+            f.write(header)
+        f.write(frames)
+    f.write(b'\x3B')
+
+
+def export_gif(left_data, right_data, layout, name, save_as, fps=10, cmap='viridis', workers=None):
+    """Write the animate_feet animation as an optimized GIF. Returns the number of stored frames."""
+    left_data = np.asarray(left_data, dtype=float)
+    right_data = np.asarray(right_data, dtype=float)
+    vmin = float(min(left_data.min(), right_data.min()))
+    vmax = float(max(left_data.max(), right_data.max()))
+
+    background, squares = _render_layout(layout, name, cmap, vmin, vmax)
+    palette, bg_index = _build_palette(background, cmap)
+    levels, durations = dedupe_levels(frame_levels(left_data, right_data, vmin, vmax), int(round(1000 / fps)))
+
+    starts = range(0, len(levels), CHUNK_FRAMES)
+    chunk_levels = [levels[s:s + CHUNK_FRAMES] for s in starts]
+    chunk_durations = [durations[s:s + CHUNK_FRAMES] for s in starts]
+    with open(save_as, 'wb') as f:
+        if workers == 1 or len(chunk_levels) == 1:
+            _init_layout(bg_index, squares, palette)
+            _write_chunks(f, map(_encode_chunk, chunk_levels, chunk_durations))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_layout,
+                                     initargs=(bg_index, squares, palette)) as pool:
+                _write_chunks(f, pool.map(_encode_chunk, chunk_levels, chunk_durations))
+    return len(levels)
@@ -0,0 +1,43 @@
+import os
+import sys
+
+"""
+Matplotlib backend selection, done only when a GUI is actually requested
+- Data / CoG / simulation modules must not import matplotlib at import time
+  (see import_timing.py), they call these helpers right before opening a window
+- Falls back to Agg on machines without a display instead of failing
+"""
+
+GUI_BACKEND = 'TkAgg'
+
+
+def has_display():
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+def use_gui_backend(backend=GUI_BACKEND):
+    """Select the interactive backend (MPLBACKEND env var wins) and return pyplot."""
+    import matplotlib
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use(backend if has_display() else 'Agg')
+    from matplotlib import pyplot as plt
+    return plt
+
+
+def use_headless_backend():
+    """Agg backend for exports / CI, returns pyplot."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import pyplot as plt
+    return plt
+
+
+def disable_conflicting_keys(plt):
+    """Disable Matplotlib key bindings that clash with game controls (e.g. 's' would save)."""
+    plt.rcParams['keymap.save'] = ''
+    plt.rcParams['keymap.fullscreen'] = ''
+    plt.rcParams['keymap.home'] = ''
+    plt.rcParams['keymap.back'] = ''
+    plt.rcParams['keymap.forward'] = ''
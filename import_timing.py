@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+"""
+Import-time check for the headless modules (data, CoG, simulation)
+- Each module is imported in a fresh interpreter, numpy is imported (and timed) first
+  so the reported number is the module's own cost
+- Fails if a module pulls in matplotlib / tkinter at import time or exceeds its budget
+- usage: python import_timing.py [budget_ms]
+"""
+
+HEADLESS_MODULES = [
+    'json_utils',
+    'layouts',
+    'gui_backend',
+    'calibration',
+    'tk_view',
+    'video',
+    'aggregate',
+    'sole_interp',
+    'sway_metrics',
+    'cog_predictor',
+    'scheduler',
+    'trail',
+    'latency_harness',
+    'gif_export',
+    'validation',
+    'video2_with_cog',
+    'plot_frame',
+    'arcade_game',
+    'arcade_game2',
+    'control_cog_game',
+    'simulated_data_game',
+]
+FORBIDDEN = ('matplotlib', 'tkinter', 'PIL')
+BUDGET_MS = 30.0
+REPEATS = 3
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import numpy
+t1 = time.perf_counter()
+import {module}
+t2 = time.perf_counter()
+print(json.dumps({{
+    'numpy_ms': (t1 - t0) * 1e3,
+    'module_ms': (t2 - t1) * 1e3,
+    'forbidden': [m for m in {forbidden!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module, repeats=REPEATS):
+    """Best-of-`repeats` import cost of `module` in a fresh interpreter."""
+    best = None
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, forbidden=FORBIDDEN)],
+                             cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result['module_ms'] < best['module_ms']:
+            best = result
+    return best
+
+
+def main(budget_ms=BUDGET_MS):
+    failed = []
+    print(f"{'module':<22}{'import ms':>10}{'numpy ms':>10}  forbidden")
+    for module in HEADLESS_MODULES:
+        result = measure(module)
+        bad = result['forbidden'] or result['module_ms'] > budget_ms
+        print(f"{module:<22}{result['module_ms']:>10.1f}{result['numpy_ms']:>10.1f}  "
+              f"{','.join(result['forbidden']) or '-'}{'  <-- FAIL' if bad else ''}")
+        if bad:
+            failed.append(module)
+    if failed:
+        print(f"Import budget ({budget_ms:.0f} ms, no GUI modules) exceeded by: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS))
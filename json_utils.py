@@ -1,11 +1,8 @@
 import json
 from pathlib import Path
 
-import numpy as np
-from matplotlib import pyplot as plt
-
-from matplotlib import use
-use('TkAgg')
+# No matplotlib here: loaders / exporters import this module and must stay headless and fast.
+# GUI scripts pick their backend via gui_backend.use_gui_backend() when they open a window.
 
 def load_json(filepath):
     with open(filepath, "r") as f:
@@ -29,6 +26,7 @@ if __name__ == '__main__':
     # L (list)
     # T (number)
 
-    t = np.sort([data[i]["T"] for i in range(len(data))])
-    R = np.vstack([data[i]["R"] for i in range(len(data))])
-    L = np.vstack([data[i]["L"] for i in range(len(data))])
+    from validation import validate_segment, format_report
+
+    t, L, R, report = validate_segment(data)
+    print(format_report(report))
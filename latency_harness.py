@@ -0,0 +1,274 @@
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from calibration import Calibration, CalibratedRing
+from validation import expire_seconds
+
+"""
+End-to-end latency harness: sensor sample timestamp -> CoG dot drawn on screen
+- A stand-in sensor emitter (background thread) sends samples shaped like the insole stream
+  (id, Session, T, Expire, L, R), with T / Expire stamped on the harness clock when sent
+- Every render tick drains the received samples and stamps each one through the pipeline of
+  arcade_game2: received (after ingestion: calibrated into the live CalibratedRing), CoG computed,
+  game updated, frame drawn
+- Stages: ingest = T -> received, cog, update, draw, and end_to_end = T -> drawn
+- Drawing uses an Agg canvas directly (no pyplot, no window), so it runs headless in CI;
+  'blit' mode restores a cached background and redraws only the moving artists, 'full' redraws the figure
+- Expired samples (Expire before they were received) are counted and dropped, like validation does
+- usage: python latency_harness.py [--seconds 5] [--rate 100] [--mode blit|full] [--save run.npz]
+"""
+
+STAMPS = ('sent', 'received', 'cog', 'update', 'drawn')
+STAGES = ('ingest', 'cog', 'update', 'draw')
+HIST_EDGES_MS = (0.0, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, np.inf)
+SENSOR_RATE = 100.0   # Hz
+EXPIRE_TTL = 0.25     # s a sample stays valid after T
+
+
+# ---------------------- Stand-in sensor ----------------------
+def synthetic_frames(rate_hz=SENSOR_RATE, period=4.0):
+    """One loop of (T, N) L/R frames: both feet's pressure blobs circling, as in arcade_game2."""
+    import arcade_game2 as game
+
+    phase = np.linspace(0.0, 2 * np.pi, max(int(rate_hz * period), 2), endpoint=False)
+    cx, cy = 0.8 * np.cos(phase), 2.0 * np.sin(phase)
+    left = np.array([game.gaussian_blob(game.left_offset + x, y, game.x_left_phys, game.y_left_phys) for x, y in zip(cx, cy)])
+    right = np.array([game.gaussian_blob(game.right_offset + x, y, game.x_right_phys, game.y_right_phys) for x, y in zip(cx, cy)])
+    return left, right
+
+
+class SensorEmitter(threading.Thread):
+    """Sends samples into `out` at a fixed rate, looping over (T, N) left / right frames."""
+
+    def __init__(self, out, left, right, rate_hz=SENSOR_RATE, ttl=EXPIRE_TTL, clock=time.perf_counter, session='harness'):
+        super().__init__(daemon=True)
+        self.out = out
+        self.left, self.right = np.asarray(left, dtype=float), np.asarray(right, dtype=float)
+        self.rate_hz = rate_hz
+        self.ttl = ttl
+        self.clock = clock
+        self.session = session
+        self.sent = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        period = 1.0 / self.rate_hz
+        next_t = self.clock()
+        while not self._stop_event.is_set():
+            now = self.clock()
+            if now < next_t:
+                time.sleep(next_t - now)
+                continue
+            i = self.sent % len(self.left)
+            t = self.clock()
+            expire = t + self.ttl
+            self.out.put({"id": self.sent, "Session": self.session, "T": t,
+                          "Expire": [int(expire), int((expire % 1.0) * 1e9)],
+                          "L": self.left[i].tolist(), "R": self.right[i].tolist()})
+            self.sent += 1
+            next_t += period
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ---------------------- Recording ----------------------
+class LatencyLog:
+    """Per-sample pipeline stamps (seconds), shaped (n, 5) in STAMPS order. Keeps the last `capacity` samples."""
+
+    def __init__(self, capacity=1 << 16):
+        self.stamps = np.full((capacity, len(STAMPS)), np.nan)
+        self.capacity = capacity
+        self.count = 0
+        self.expired = 0
+        self.frames = 0
+
+    def record(self, stamps):
+        idx = (self.count + np.arange(len(stamps))) % self.capacity
+        self.stamps[idx] = stamps
+        self.count += len(stamps)
+
+    def latencies(self):
+        """{stage: latencies in ms} for every stage plus end_to_end."""
+        stamps = self.stamps[:min(self.count, self.capacity)]
+        steps = np.diff(stamps, axis=1) * 1e3
+        out = {name: steps[:, i] for i, name in enumerate(STAGES)}
+        out['end_to_end'] = (stamps[:, -1] - stamps[:, 0]) * 1e3
+        return out
+
+    def histograms(self):
+        """{stage: sample counts per HIST_EDGES_MS bin}."""
+        return {name: np.histogram(ms, bins=HIST_EDGES_MS)[0] for name, ms in self.latencies().items()}
+
+    def report(self):
+        edges = HIST_EDGES_MS
+        bins = [f"<{e:g}" for e in edges[1:-1]] + [f">={edges[-2]:g}"]
+        lines = [f"{self.count} samples, {self.frames} frames drawn, {self.expired} expired",
+                 f"{'stage (ms)':<12}{'p50':>7}{'p90':>7}{'p99':>7}{'max':>7}  " + ''.join(f"{b:>6}" for b in bins)]
+        hists = self.histograms()
+        for name, ms in self.latencies().items():
+            if len(ms):
+                p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+                mx = ms.max()
+            else:
+                p50 = p90 = p99 = mx = np.nan
+            lines.append(f"{name:<12}{p50:7.2f}{p90:7.2f}{p99:7.2f}{mx:7.2f}  " + ''.join(f"{c:6d}" for c in hists[name]))
+        return '\n'.join(lines)
+
+    def save(self, path):
+        n = min(self.count, self.capacity)
+        np.savez(path, stamps=self.stamps[:n], expired=self.expired, frames=self.frames)
+
+
+# ---------------------- Headless display ----------------------
+class AggGameView:
+    """arcade_game2's two panels on an Agg canvas. draw() renders one frame into the canvas buffer."""
+
+    def __init__(self, game, mode='blit', figsize=(14, 6), dpi=100):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.game = game
+        self.blit = mode == 'blit'
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        axFeet, axGame = self.fig.subplots(1, 2)
+        for ax in (axFeet, axGame):
+            ax.set_xlim(game.x_min, game.x_max)
+            ax.set_ylim(game.y_min, game.y_max)
+            ax.set_aspect('equal')
+        axFeet.set_title('Feet (blue=left, green=right). Red = CoG')
+        axFeet.axhline(0, color='gray', ls='--', lw=0.8)
+        axFeet.axvline(0, color='gray', ls='--', lw=0.8)
+        axGame.set_title('Game (red dot)')
+        self.left_scatter = axFeet.scatter(game.x_left_phys, game.y_left_phys, c=game.left_vals,
+                                           cmap='Blues', vmin=0, vmax=game.AMP, s=120, marker='s')
+        self.right_scatter = axFeet.scatter(game.x_right_phys, game.y_right_phys, c=game.right_vals,
+                                            cmap='Greens', vmin=0, vmax=game.AMP, s=120, marker='s')
+        self.cog_marker, = axFeet.plot([], [], 'ro', markersize=10)
+        self.char_marker, = axGame.plot([], [], 'ro', markersize=10)
+        self.obstacles_marker, = axGame.plot([], [], 'ks', markersize=8)
+        self.score_text = axGame.text(0.02, 0.98, '', transform=axGame.transAxes, va='top')
+        self.artists = (self.left_scatter, self.right_scatter, self.cog_marker, self.char_marker,
+                        self.obstacles_marker, self.score_text)
+        for a in self.artists:
+            a.set_animated(self.blit)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox) if self.blit else None
+
+    def draw(self):
+        game = self.game
+        self.left_scatter.set_array(game.left_vals)
+        self.right_scatter.set_array(game.right_vals)
+        self.cog_marker.set_data([game.pred_x], [game.pred_y])
+        self.char_marker.set_data([game.dot_pos[0]], [game.dot_pos[1]])
+        if game.obstacles:
+            oxs, oys = zip(*game.obstacles)
+            self.obstacles_marker.set_data(oxs, oys)
+        else:
+            self.obstacles_marker.set_data([], [])
+        self.score_text.set_text(f"Score: {game.score}")
+        if self.blit:
+            self.canvas.restore_region(self.background)
+            for a in self.artists:
+                self.fig.draw_artist(a)
+            self.canvas.blit(self.fig.bbox)
+        else:
+            self.canvas.draw()
+
+
+# ---------------------- Harness ----------------------
+def _drain(q):
+    batch = []
+    while True:
+        try:
+            batch.append(q.get_nowait())
+        except queue.Empty:
+            return batch
+
+
+def run_harness(seconds=5.0, rate_hz=SENSOR_RATE, interval_ms=None, mode='blit', ttl=EXPIRE_TTL,
+                frames=None, calibration=None, seed=0, clock=time.perf_counter):
+    """
+    Run emitter + arcade_game2 pipeline + Agg drawing for `seconds`. Returns the LatencyLog.
+    calibration: Calibration applied on ingestion (identity by default, so the cost is still measured).
+    """
+    import arcade_game2 as game
+
+    random.seed(seed)
+    interval = (game.RENDER_INTERVAL if interval_ms is None else interval_ms) / 1000.0
+    left, right = synthetic_frames(rate_hz) if frames is None else frames
+    game.reset_game()
+    view = AggGameView(game, mode=mode)
+    log = LatencyLog()
+    samples = queue.SimpleQueue()
+    ring = CalibratedRing(Calibration.identity(left.shape[1]) if calibration is None else calibration)
+    emitter = SensorEmitter(samples, left, right, rate_hz=rate_hz, ttl=ttl, clock=clock)
+
+    emitter.start()
+    end = clock() + seconds
+    next_tick = clock()
+    try:
+        while True:
+            now = clock()
+            if now >= end:
+                break
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            next_tick += interval * max(1, int((now - next_tick) / interval) + 1)  # skip missed ticks
+
+            batch = _drain(samples)
+            stamps = np.empty((len(batch), len(STAMPS)))
+            n = 0
+            for s in batch:
+                if expire_seconds(s["Expire"]) < clock():
+                    log.expired += 1
+                    continue
+                frame = ring.push(s["L"], s["R"])  # (2, N) calibrated row of the live ring
+                stamps[n, 0] = s["T"]
+                stamps[n, 1] = clock()
+                game.ingest_frame(frame[0], frame[1], t=s["T"])
+                stamps[n, 2] = clock()
+                n += 1
+            if n == 0:
+                continue
+
+            if game.game_over:
+                game.reset_game()
+            game.update_game()
+            stamps[:n, 3] = clock()
+            view.draw()
+            stamps[:n, 4] = clock()
+            log.record(stamps[:n])
+            log.frames += 1
+    finally:
+        emitter.stop()
+    print(game.predictor.summary())
+    return log
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure sensor-sample -> drawn-frame latency of arcade_game2 (headless)")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=SENSOR_RATE, help="sensor sample rate (Hz)")
+    parser.add_argument('--interval', type=float, default=None, help="render interval (ms), default arcade_game2.RENDER_INTERVAL")
+    parser.add_argument('--mode', choices=('blit', 'full'), default='blit')
+    parser.add_argument('--ttl', type=float, default=EXPIRE_TTL, help="sample Expire = T + ttl (s)")
+    parser.add_argument('--calibration', help="calibration table (.npz, see calibration.py) applied on ingestion")
+    parser.add_argument('--save', help="write the raw stamps to this .npz for before/after comparisons")
+    args = parser.parse_args()
+
+    calibration = Calibration.load(args.calibration) if args.calibration else None
+    log = run_harness(args.seconds, rate_hz=args.rate, interval_ms=args.interval, mode=args.mode, ttl=args.ttl,
+                      calibration=calibration)
+    print(log.report())
+    if args.save:
+        log.save(args.save)
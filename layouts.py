@@ -0,0 +1,138 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+"""
+Sensor layouts defined in YAML (layouts/<name>.yaml), compiled once into index / coordinate tables
+- rows: columns occupied in each sensor row (top to bottom), sensors indexed row-major
+- spacing, mirror (which foot is column-reversed), outline polygon
+- Compiled tables are cached in memory and in layouts/.cache/<name>.npz (rebuilt when the YAML
+  changes), so importing a visualizer doesn't need PyYAML
+- Pick the insole with the VR_STEPS_LAYOUT env var (layout name or path to a .yaml file)
+"""
+
+LAYOUT_DIR = Path(__file__).parent.joinpath('layouts')
+CACHE_DIR = LAYOUT_DIR.joinpath('.cache')
+DEFAULT_LAYOUT = 'pedisol_40'
+
+
+class SensorLayout:
+    """
+    Compiled tables of one insole layout:
+    rc (N, 2) row/col per sensor, mask (ROWS, COLS) sensor index or NaN, coords (N, 2) x/y positions
+    (col * spacing x, row * spacing y), width / height of the sensor area in those units,
+    outline (M, 2) foot polygon in the same units (empty if the YAML has none),
+    flat_index (N,) position of each sensor in a flattened (ROWS, COLS) grid (and its mirrored twin).
+    """
+
+    def __init__(self, name, rc, spacing, mirror, outline):
+        self.name = name
+        self.rc = np.asarray(rc, dtype=np.intp)
+        self.spacing = tuple(float(s) for s in spacing)
+        self.mirror = mirror
+        self.outline = np.asarray(outline, dtype=float).reshape(-1, 2)
+        self.n_sensors = len(self.rc)
+        self.rows = int(self.rc[:, 0].max()) + 1
+        self.cols = int(self.rc[:, 1].max()) + 1
+
+        self.mask = np.full((self.rows, self.cols), np.nan)
+        self.mask[self.rc[:, 0], self.rc[:, 1]] = np.arange(self.n_sensors)
+        self.coords = np.column_stack([self.rc[:, 1] * self.spacing[0], self.rc[:, 0] * self.spacing[1]])
+        self.width = (self.cols - 1) * self.spacing[0]
+        self.height = (self.rows - 1) * self.spacing[1]
+        self.flat_index = self.rc[:, 0] * self.cols + self.rc[:, 1]
+        self.flat_index_mirrored = self.rc[:, 0] * self.cols + (self.cols - 1 - self.rc[:, 1])
+
+    def positions(self, side):
+        """(x, y) sensor positions of 'left' / 'right' in layout units, x mirrored for the mirrored foot."""
+        x = self.coords[:, 0]
+        return (self.width - x if side == self.mirror else x.copy()), self.coords[:, 1].copy()
+
+    def outline_for(self, side):
+        """Outline polygon of 'left' / 'right', mirrored like positions()."""
+        outline = self.outline.copy()
+        if side == self.mirror and len(outline):
+            outline[:, 0] = self.width - outline[:, 0]
+        return outline
+
+    def frame_to_grid(self, values, side='right', out=None):
+        """(ROWS, COLS) grid of one foot's sensor values, NaN elsewhere. One fancy-index assignment."""
+        if out is None:
+            out = np.full((self.rows, self.cols), np.nan)
+        out.ravel()[self.flat_index_mirrored if side == self.mirror else self.flat_index] = values
+        return out
+
+    def cog_table(self, x_left, y_left, x_right, y_right):
+        """(2N, 2) positions of [left, right] sensors, CoG = vals @ table / vals.sum()."""
+        return np.column_stack([np.concatenate([x_left, x_right]), np.concatenate([y_left, y_right])]).astype(float)
+
+    def feet_table(self, gap=1.0):
+        """cog_table of both feet side by side around x = 0 (left foot at negative x), `gap` apart."""
+        x_left, y_left = self.positions('left')
+        x_right, y_right = self.positions('right')
+        return self.cog_table(x_left - self.width - gap / 2.0, y_left, x_right + gap / 2.0, y_right)
+
+
+def cog_from_table(table, left_vals, right_vals, empty=(0.0, 0.0)):
+    """CoG of one frame (N,) or a batch (T, N) of each foot from a `cog_table`."""
+    vals = np.concatenate([left_vals, right_vals], axis=-1)
+    tot = vals.sum(axis=-1)
+    if vals.ndim == 1:
+        if tot <= 1e-9:
+            return empty
+        cx, cy = vals @ table / tot
+        return cx, cy
+    cog = vals @ table / np.where(tot > 1e-9, tot, 1.0)[:, None]
+    cog[tot <= 1e-9] = empty
+    return cog
+
+
+# ---------------------- Compilation ----------------------
+def _yaml_path(name):
+    path = Path(name)
+    if path.suffix in ('.yaml', '.yml'):
+        return path
+    return LAYOUT_DIR.joinpath(f"{name}.yaml")
+
+
+def compile_layout(path):
+    """Parse a layout YAML into SensorLayout constructor arguments."""
+    import yaml
+
+    with open(path, 'r') as f:
+        spec = yaml.safe_load(f)
+    rc = [(r, c) for r, cols in enumerate(spec['rows']) for c in cols]
+    spacing = spec.get('spacing', {})
+    return {
+        'name': spec.get('name', Path(path).stem),
+        'rc': np.array(rc, dtype=np.intp),
+        'spacing': (spacing.get('x', 1.0), spacing.get('y', 1.0)),
+        'mirror': spec.get('mirror', 'left'),
+        'outline': np.array(spec.get('outline', []), dtype=float),
+    }
+
+
+@lru_cache(maxsize=None)
+def load_layout(name=None):
+    """Compiled layout by name or YAML path (default: VR_STEPS_LAYOUT env var, else pedisol_40)."""
+    name = name or os.environ.get('VR_STEPS_LAYOUT', DEFAULT_LAYOUT)
+    path = _yaml_path(name)
+    st = path.stat()
+    stamp = np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+    cache = CACHE_DIR.joinpath(f"{path.stem}.npz")
+
+    if cache.exists():
+        with np.load(cache) as f:
+            if np.array_equal(f['stamp'], stamp) and str(f['source']) == str(path.resolve()):
+                return SensorLayout(str(f['name']), f['rc'], tuple(f['spacing']), str(f['mirror']), f['outline'])
+
+    spec = compile_layout(path)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        np.savez(cache, stamp=stamp, source=str(path.resolve()), name=spec['name'], rc=spec['rc'],
+                 spacing=np.array(spec['spacing']), mirror=spec['mirror'], outline=spec['outline'])
+    except OSError:
+        pass  # read-only install: just recompile next time
+    return SensorLayout(**spec)
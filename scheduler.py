@@ -0,0 +1,89 @@
+import time
+
+"""
+Fixed-step simulation / playback decoupled from rendering
+- The simulation (game step, data playback) advances on a wall-clock fixed step `dt`;
+  each render tick runs as many steps as wall time requires (catching up when behind)
+- Rendering shows only the latest state at whatever rate the display sustains, the
+  skipped intermediate states are counted as dropped frames
+- So obstacles fall at the same speed and replays stay in real time on fast and slow machines
+"""
+
+MAX_STEPS_PER_TICK = 20  # catch-up cap per render tick; the rest carries over to the next tick
+
+
+class FixedStepScheduler:
+    """Call advance() once per render tick. `step()` returns False (and does nothing) once playback has ended."""
+
+    def __init__(self, step, dt, max_steps=MAX_STEPS_PER_TICK, clock=time.perf_counter):
+        self.step = step
+        self.dt = dt
+        self.max_steps = max_steps
+        self.clock = clock
+        self.steps = 0
+        self.renders = 0
+        self.dropped = 0
+        self.done = False
+        self._start = None
+        self._last_tick = None
+        self._render_time = 0.0
+
+    def start(self):
+        self._start = self.clock()
+        self._last_tick = self._start
+        return self
+
+    @property
+    def sim_time(self):
+        return self.steps * self.dt
+
+    @property
+    def wall_time(self):
+        return 0.0 if self._start is None else self.clock() - self._start
+
+    @property
+    def behind(self):
+        """Simulation steps still owed to wall time."""
+        if self.done:
+            return 0
+        return max(0, int(self.wall_time / self.dt) - self.steps)
+
+    def advance(self):
+        """Run the steps due by now (at most max_steps). Returns the number of steps run."""
+        if self._start is None:
+            self.start()
+        if self.done:
+            return 0
+        now = self.clock()
+        due = min(int((now - self._start) / self.dt) - self.steps, self.max_steps)
+        ran = 0
+        for _ in range(max(due, 0)):
+            if self.step() is False:
+                self.done = True
+                break
+            ran += 1
+        self.steps += ran
+        if ran:
+            self.renders += 1  # ticks with nothing new to show are not drawn by the callers
+        self.dropped += max(ran - 1, 0)  # states that were simulated but never displayed
+        self._render_time += now - self._last_tick
+        self._last_tick = now
+        return ran
+
+    def stats(self):
+        """render_fps counts only ticks that ran at least one step, i.e. frames actually shown."""
+        fps = self.renders / self._render_time if self._render_time > 0 else 0.0
+        return {
+            'steps': self.steps,
+            'renders': self.renders,
+            'dropped_frames': self.dropped,
+            'render_fps': fps,
+            'sim_time': self.sim_time,
+            'wall_time': self.wall_time,
+            'behind_steps': self.behind,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['steps']} steps / {s['renders']} renders ({s['render_fps']:.1f} fps), "
+                f"dropped {s['dropped_frames']}, sim {s['sim_time']:.2f}s / wall {s['wall_time']:.2f}s")
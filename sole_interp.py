@@ -0,0 +1,138 @@
+from functools import lru_cache
+
+import numpy as np
+
+"""
+High-resolution sole heatmaps from the 40 sensor values
+- A sparse (H*W, N) weight matrix is derived once from the sensor `coords` and a foot
+  outline mask, then cached: linear (Delaunay / barycentric) weights inside the sensor hull,
+  inverse-distance weights of the nearest sensors in the rest of the outline
+- The outline is the layout's polygon rasterized, or discs around the sensors without one
+- Upsampling a whole (T, N) block is a single sparse matmul -> (T, H, W)
+"""
+
+SHAPE = (200, 80)        # (rows, cols) of the output image
+OUTLINE_RADIUS = 0.7     # outline = union of discs of this radius (sensor spacing units) around sensors
+IDW_NEIGHBOURS = 3
+
+
+def image_extent(coords, margin=0.5, outline=None):
+    """(x_min, x_max, y_min, y_max) covered by the image (sensors and outline), in sensor coordinates."""
+    pts = np.asarray(coords, dtype=float)
+    if outline is not None and len(outline):
+        pts = np.vstack([pts, outline])
+    return (pts[:, 0].min() - margin, pts[:, 0].max() + margin,
+            pts[:, 1].min() - margin, pts[:, 1].max() + margin)
+
+
+def pixel_centers(coords, shape=SHAPE, outline=None):
+    x_min, x_max, y_min, y_max = image_extent(coords, outline=outline)
+    rows, cols = shape
+    xs = x_min + (np.arange(cols) + 0.5) * (x_max - x_min) / cols
+    ys = y_min + (np.arange(rows) + 0.5) * (y_max - y_min) / rows
+    gx, gy = np.meshgrid(xs, ys)
+    return np.column_stack([gx.ravel(), gy.ravel()])
+
+
+def foot_outline_mask(coords, shape=SHAPE, radius=OUTLINE_RADIUS):
+    """(H, W) bool mask of pixels within `radius` of a sensor, closed over the convex hull gaps."""
+    from scipy.ndimage import binary_closing, binary_fill_holes
+    from scipy.spatial import cKDTree
+
+    pix = pixel_centers(coords, shape)
+    dist, _ = cKDTree(np.asarray(coords, dtype=float)).query(pix)
+    mask = (dist <= radius).reshape(shape)
+    mask = binary_closing(mask, structure=np.ones((5, 5)), border_value=0)
+    return binary_fill_holes(mask)
+
+
+def polygon_mask(polygon, coords, shape=SHAPE):
+    """(H, W) bool mask of pixels inside the (M, 2) `polygon` (even-odd rule), on the image grid of pixel_centers."""
+    polygon = np.asarray(polygon, dtype=float)
+    px, py = pixel_centers(coords, shape, outline=polygon).T
+    inside = np.zeros(len(px), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if y1 == y2:
+            continue  # horizontal edges never cross a horizontal ray
+        crosses = (y1 > py) != (y2 > py)
+        inside ^= crosses & (px < x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+    return inside.reshape(shape)
+
+
+def _weights(coords, shape, radius, outline=None):
+    from scipy.sparse import csr_matrix
+    from scipy.spatial import Delaunay, cKDTree
+
+    coords = np.asarray(coords, dtype=float)
+    pix = pixel_centers(coords, shape, outline)
+    if outline is not None and len(outline):
+        mask = polygon_mask(outline, coords, shape).ravel()
+    else:
+        mask = foot_outline_mask(coords, shape, radius).ravel()
+    inside = np.flatnonzero(mask)
+
+    tri = Delaunay(coords)
+    simplex = tri.find_simplex(pix[inside])
+    in_hull = simplex >= 0
+
+    # barycentric weights for pixels inside the sensor hull (same as griddata 'linear')
+    hull_pix = inside[in_hull]
+    s = simplex[in_hull]
+    T = tri.transform[s]
+    b = np.einsum('nij,nj->ni', T[:, :2], pix[hull_pix] - T[:, 2])
+    bary = np.column_stack([b, 1.0 - b.sum(axis=1)])
+    rows = [np.repeat(hull_pix, 3)]
+    cols = [tri.simplices[s].ravel()]
+    vals = [bary.ravel()]
+
+    # inverse distance weights for the outline outside the hull
+    out_pix = inside[~in_hull]
+    if len(out_pix):
+        dist, idx = cKDTree(coords).query(pix[out_pix], k=IDW_NEIGHBOURS)
+        w = 1.0 / np.maximum(dist, 1e-6) ** 2
+        w /= w.sum(axis=1, keepdims=True)
+        rows.append(np.repeat(out_pix, IDW_NEIGHBOURS))
+        cols.append(idx.ravel())
+        vals.append(w.ravel())
+
+    weights = csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                         shape=(len(pix), len(coords)))
+    return weights, mask.reshape(shape)
+
+
+@lru_cache(maxsize=8)
+def _cached_weights(coords_key, shape, radius, outline_key=b''):
+    coords = np.frombuffer(coords_key, dtype=float).reshape(-1, 2)
+    outline = np.frombuffer(outline_key, dtype=float).reshape(-1, 2)
+    return _weights(coords, shape, radius, outline)
+
+
+class SoleUpsampler:
+    """Upsamples (N,) frames or (T, N) blocks of sensor values to (H, W) / (T, H, W) images."""
+
+    def __init__(self, coords, shape=SHAPE, radius=OUTLINE_RADIUS, mirror_x=False, outline=None):
+        """outline: (M, 2) foot polygon in the coords' units (layout.outline); None falls back to `radius` discs."""
+        coords = np.array(coords, dtype=float)
+        outline = np.array([] if outline is None else outline, dtype=float).reshape(-1, 2)
+        if mirror_x:
+            coords[:, 0] = -coords[:, 0]
+            outline[:, 0] = -outline[:, 0]
+        self.coords = coords
+        self.outline = outline
+        self.shape = tuple(shape)
+        self.extent = image_extent(coords, outline=outline)
+        self.weights, self.mask = _cached_weights(coords.tobytes(), self.shape, float(radius), outline.tobytes())
+        self._outside = np.flatnonzero(~self.mask.ravel())
+        # (N, P) CSC: dense (T, N) @ CSC yields a Fortran-ordered (T, P) result without a transpose copy
+        self.weights_t = self.weights.T.tocsc()
+
+    def __call__(self, values, fill=np.nan):
+        """Images for `values`; pixels outside the foot outline get `fill` (None leaves them 0)."""
+        values = np.asarray(values, dtype=float)
+        block = np.atleast_2d(values)
+        images = np.asfortranarray(block) @ self.weights_t
+        if fill is not None:
+            images[:, self._outside] = fill
+        # splitting the pixel axis of a Fortran-ordered array is a view, no copy
+        images = images.reshape(len(block), *self.shape)
+        return images[0] if values.ndim == 1 else images
@@ -0,0 +1,127 @@
+import numpy as np
+
+"""
+Sliding-window sway metrics over the CoG stream
+- path length, RMS displacement, 95% confidence ellipse area, mean velocity, left/right load share
+- live: SwayMetrics.push() is O(1) per window per sample; every window keeps running sums of
+  [x, y, x^2, y^2, xy, step length, left load, right load] over one shared ring buffer
+- batch: sway_metrics_batch() gives the same numbers for a whole recording from cumulative sums
+"""
+
+CHI2_95_2DOF = 5.991464547107979  # 95% quantile of chi-square with 2 dof
+RESYNC_EVERY = 4096               # recompute running sums exactly this often (float drift)
+
+# feature columns
+_X, _Y, _XX, _YY, _XY, _STEP, _L, _R = range(8)
+
+
+def _metrics_from_sums(sums, n, duration):
+    """Metrics dict from window sums (..., 8), sample counts n and window durations (seconds)."""
+    n = np.maximum(n, 1)
+    mx, my = sums[..., _X] / n, sums[..., _Y] / n
+    var_x = np.maximum(sums[..., _XX] / n - mx * mx, 0.0)
+    var_y = np.maximum(sums[..., _YY] / n - my * my, 0.0)
+    cov = sums[..., _XY] / n - mx * my
+    det = np.maximum(var_x * var_y - cov * cov, 0.0)
+    # path length counts the steps inside the window: the first sample's step reaches outside it
+    path = sums[..., _STEP]
+    load = sums[..., _L] + sums[..., _R]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = np.where(duration > 0, path / duration, 0.0)
+        left_share = np.where(load > 0, sums[..., _L] / load, 0.5)
+    return {
+        'mean_x': mx,
+        'mean_y': my,
+        'path_length': path,
+        'rms': np.sqrt(var_x + var_y),
+        'ellipse_area': np.pi * CHI2_95_2DOF * np.sqrt(det),
+        'mean_velocity': velocity,
+        'left_share': left_share,
+    }
+
+
+def _features(x, y, left, right, prev_x, prev_y):
+    step = np.hypot(x - prev_x, y - prev_y)
+    return np.stack([x, y, x * x, y * y, x * y, step,
+                     np.asarray(left, dtype=float), np.asarray(right, dtype=float)], axis=-1)
+
+
+class SwayMetrics:
+    """Running sway metrics for several window lengths (in samples) at once."""
+
+    def __init__(self, windows=(20, 100), dt=0.05):
+        self.windows = tuple(int(w) for w in windows)
+        self.dt = dt  # sample period used when push() gets no timestamp
+        self.capacity = max(self.windows)
+        self.ring = np.zeros((self.capacity, 8))
+        self.times = np.zeros(self.capacity)
+        self.sums = np.zeros((len(self.windows), 8))
+        self.count = 0
+        self._prev = None
+
+    def push(self, x, y, left_load=0.0, right_load=0.0, t=None):
+        """Add one CoG sample (and total L / R load). O(number of windows)."""
+        if t is None:
+            t = self.count * self.dt
+        px, py = self._prev if self._prev is not None else (x, y)
+        self._prev = (x, y)
+        feat = _features(float(x), float(y), left_load, right_load, px, py)
+        # first step of each window reaches outside it, so its length is not part of the window path
+        for i, w in enumerate(self.windows):
+            if self.count >= w:
+                self.sums[i] -= self.ring[(self.count - w) % self.capacity]
+            self.sums[i] += feat
+        slot = self.count % self.capacity
+        self.ring[slot] = feat
+        self.times[slot] = t
+        self.count += 1
+        if self.count % RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self):
+        for i, w in enumerate(self.windows):
+            self.sums[i] = self._window_rows(w).sum(axis=0)
+
+    def _window_rows(self, w):
+        n = min(w, self.count)
+        idx = (self.count - n + np.arange(n)) % self.capacity
+        return self.ring[idx]
+
+    def metrics(self):
+        """{window: metrics dict} for the current state."""
+        out = {}
+        for i, w in enumerate(self.windows):
+            n = min(w, self.count)
+            if n == 0:
+                out[w] = _metrics_from_sums(np.zeros(8), 0, 0.0)
+                continue
+            first = (self.count - n) % self.capacity
+            last = (self.count - 1) % self.capacity
+            sums = self.sums[i].copy()
+            sums[_STEP] -= self.ring[first, _STEP]
+            out[w] = _metrics_from_sums(sums, n, self.times[last] - self.times[first])
+        return out
+
+
+def sway_metrics_batch(cog, left_load=None, right_load=None, t=None, windows=(20, 100), dt=0.05):
+    """
+    Metrics of every trailing window for a whole recording.
+    cog: (T, 2). Returns {window: metrics dict of (T,) arrays}, value i covers samples [i-w+1, i].
+    """
+    cog = np.asarray(cog, dtype=float)
+    n = len(cog)
+    left_load = np.zeros(n) if left_load is None else left_load
+    right_load = np.zeros(n) if right_load is None else right_load
+    t = np.arange(n) * dt if t is None else np.asarray(t, dtype=float)
+    prev = np.vstack([cog[:1], cog[:-1]])
+    feat = _features(cog[:, 0], cog[:, 1], left_load, right_load, prev[:, 0], prev[:, 1])
+    csum = np.vstack([np.zeros((1, 8)), np.cumsum(feat, axis=0)])
+
+    out = {}
+    end = np.arange(1, n + 1)
+    for w in windows:
+        start = np.maximum(end - w, 0)
+        sums = csum[end] - csum[start]
+        sums[:, _STEP] -= feat[start, _STEP]
+        out[w] = _metrics_from_sums(sums, end - start, t[end - 1] - t[start])
+    return out
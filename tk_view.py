@@ -0,0 +1,250 @@
+import time
+
+import numpy as np
+
+"""
+Fast Tk-canvas display backend for the live games
+- Everything (foot heatmaps, CoG dot, obstacles, trail) is composited into one reused
+  RGBA NumPy buffer, copied once per frame into a PIL image allocated at startup, and
+  pushed to a Tk PhotoImage with paste()
+- Ticks are scheduled against fixed deadlines, so the frame work doesn't stretch the period
+- Static parts (panel frames, guide lines) are drawn once into a background buffer
+- Sensor squares and marker shapes are precomputed as flat pixel indices, so a frame is
+  a handful of fancy-index assignments instead of a matplotlib redraw
+- Polylines (trails) are rasterized per frame, one vectorized pass over all segments
+- Titles / score go into a Tk label, no text rasterizing per frame
+"""
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (220, 30, 30)
+BLUE = (40, 80, 220)
+GRAY = (170, 170, 170)
+
+
+# ---------------------- Helpers ----------------------
+def colormap_lut(name, n=256):
+    """(n, 4) uint8 RGBA lookup table for a matplotlib colormap name."""
+    from matplotlib import colormaps
+    lut = colormaps[name](np.linspace(0.0, 1.0, n))
+    return (lut * 255).round().astype(np.uint8)
+
+
+def _rgba(color):
+    return np.array([*color, 255], dtype=np.uint8)
+
+
+class Panel:
+    """Maps world coordinates of one plot area to buffer pixels (equal aspect)."""
+
+    def __init__(self, x_lim, y_lim, box, invert_y=False):
+        left, top, width, height = box
+        self.x_lim, self.y_lim = x_lim, y_lim
+        self.box = box
+        self.invert_y = invert_y
+        self.scale = min(width / (x_lim[1] - x_lim[0]), height / (y_lim[1] - y_lim[0]))
+        # center the data area inside the box
+        self.x0 = left + (width - self.scale * (x_lim[1] - x_lim[0])) / 2.0
+        self.y0 = top + (height - self.scale * (y_lim[1] - y_lim[0])) / 2.0
+
+    def to_px(self, xs, ys):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        px = self.x0 + (xs - self.x_lim[0]) * self.scale
+        if self.invert_y:
+            py = self.y0 + (ys - self.y_lim[0]) * self.scale
+        else:
+            py = self.y0 + (self.y_lim[1] - ys) * self.scale
+        return px.round().astype(np.intp), py.round().astype(np.intp)
+
+    def clip(self):
+        """Pixel bounds (x_lo, y_lo, x_hi, y_hi) of the data area, inclusive."""
+        px, py = self.to_px(self.x_lim, self.y_lim)
+        return px.min(), py.min(), px.max(), py.max()
+
+
+class TkCanvasView:
+    """Single-buffer Tk view. Call `run(step)` with a function that advances the game."""
+
+    def __init__(self, width, height, title='VR steps'):
+        self.width, self.height = width, height
+        self.title = title
+        self.buffer = np.empty((height, width, 4), dtype=np.uint8)
+        self.background = np.empty_like(self.buffer)
+        self.background[...] = _rgba(WHITE)
+        self._flat = self.buffer.reshape(-1, 4)
+        self._heatmaps = []
+        self._markers = {}
+        self._lines = {}
+        self._text = ''
+        self._text_color = 'black'
+        self.root = None
+
+    # ---- Static layout (drawn once into the background) ----
+    def add_panel(self, x_lim, y_lim, box, invert_y=False, frame=True):
+        panel = Panel(x_lim, y_lim, box, invert_y=invert_y)
+        if frame:
+            x_lo, y_lo, x_hi, y_hi = panel.clip()
+            self.background[y_lo:y_hi + 1, [x_lo, x_hi]] = _rgba(BLACK)
+            self.background[[y_lo, y_hi], x_lo:x_hi + 1] = _rgba(BLACK)
+        return panel
+
+    def add_hline(self, panel, y, color=GRAY, dash=6):
+        x_lo, _, x_hi, _ = panel.clip()
+        _, py = panel.to_px([0.0], [y])
+        xs = np.arange(x_lo, x_hi + 1)
+        xs = xs[(xs - x_lo) % (2 * dash) < dash]
+        self.background[py[0], xs] = _rgba(color)
+
+    def add_vline(self, panel, x, color=GRAY, dash=6):
+        _, y_lo, _, y_hi = panel.clip()
+        px, _ = panel.to_px([x], [0.0])
+        ys = np.arange(y_lo, y_hi + 1)
+        ys = ys[(ys - y_lo) % (2 * dash) < dash]
+        self.background[ys, px[0]] = _rgba(color)
+
+    def add_heatmap(self, panel, xs, ys, cell, cmap='viridis', vmin=0.0, vmax=1.0):
+        """Register square sensor cells (world size `cell`) and return a heatmap id."""
+        px, py = panel.to_px(xs, ys)
+        half = max(1, int(round(cell * panel.scale / 2.0)))
+        offs = np.arange(-half, half + 1)
+        dy, dx = np.meshgrid(offs, offs, indexing='ij')
+        cell_x = (px[:, None] + dx.ravel()[None, :])
+        cell_y = (py[:, None] + dy.ravel()[None, :])
+        owner = np.repeat(np.arange(len(px)), dx.size)
+        keep = ((cell_x >= 0) & (cell_x < self.width) & (cell_y >= 0) & (cell_y < self.height)).ravel()
+        pix = (cell_y * self.width + cell_x).ravel()[keep]
+        self._heatmaps.append({
+            'pix': pix,
+            'owner': owner[keep],
+            'lut': colormap_lut(cmap),
+            'vmin': float(vmin),
+            'span': float(vmax - vmin) or 1.0,
+            'values': np.zeros(len(px)),
+        })
+        return len(self._heatmaps) - 1
+
+    def set_heatmap(self, heatmap_id, values):
+        self._heatmaps[heatmap_id]['values'] = np.asarray(values, dtype=float)
+
+    # ---- Dynamic markers (recomputed per frame, tiny) ----
+    def add_marker(self, name, panel, radius, color, shape='circle'):
+        offs = np.arange(-radius, radius + 1)
+        dy, dx = np.meshgrid(offs, offs, indexing='ij')
+        if shape == 'circle':
+            inside = dx * dx + dy * dy <= radius * radius
+            dx, dy = dx[inside], dy[inside]
+        self._markers[name] = {
+            'panel': panel,
+            'dx': dx.ravel(),
+            'dy': dy.ravel(),
+            'color': _rgba(color),
+            'xs': np.empty(0),
+            'ys': np.empty(0),
+        }
+
+    def set_marker(self, name, xs, ys):
+        marker = self._markers[name]
+        marker['xs'] = np.asarray(xs, dtype=float).ravel()
+        marker['ys'] = np.asarray(ys, dtype=float).ravel()
+
+    # ---- Dynamic polylines (e.g. trails), rasterized per frame ----
+    def add_line(self, name, panel, color):
+        self._lines[name] = {'panel': panel, 'color': _rgba(color), 'xs': np.empty(0), 'ys': np.empty(0)}
+
+    def set_line(self, name, xs, ys):
+        line = self._lines[name]
+        line['xs'] = np.asarray(xs, dtype=float).ravel()
+        line['ys'] = np.asarray(ys, dtype=float).ravel()
+
+    def set_text(self, text, color='black'):
+        self._text = text
+        self._text_color = color
+
+    # ---- Compositing ----
+    def compose(self):
+        """Fill `self.buffer` with the current frame. Does not touch Tk."""
+        np.copyto(self.buffer, self.background)
+        flat = self._flat
+        for hm in self._heatmaps:
+            q = (hm['values'] - hm['vmin']) * (255.0 / hm['span'])
+            q = np.clip(q, 0, 255).astype(np.intp)
+            flat[hm['pix']] = hm['lut'][q[hm['owner']]]
+        for line in self._lines.values():
+            if line['xs'].size < 2:
+                continue
+            panel = line['panel']
+            x_lo, y_lo, x_hi, y_hi = panel.clip()
+            px, py = panel.to_px(line['xs'], line['ys'])
+            # every segment sampled at one point per pixel step along its longer axis
+            dx, dy = np.diff(px), np.diff(py)
+            steps = np.maximum(np.abs(dx), np.abs(dy)) + 1
+            seg = np.repeat(np.arange(len(steps)), steps)
+            t = (np.arange(len(seg)) - np.repeat(np.cumsum(steps) - steps, steps)) / np.maximum(steps - 1, 1)[seg]
+            xs = np.rint(px[seg] + dx[seg] * t).astype(np.intp)
+            ys = np.rint(py[seg] + dy[seg] * t).astype(np.intp)
+            keep = (xs >= x_lo) & (xs <= x_hi) & (ys >= y_lo) & (ys <= y_hi)
+            flat[ys[keep] * self.width + xs[keep]] = line['color']
+        for marker in self._markers.values():
+            if marker['xs'].size == 0:
+                continue
+            panel = marker['panel']
+            x_lo, y_lo, x_hi, y_hi = panel.clip()
+            px, py = panel.to_px(marker['xs'], marker['ys'])
+            xs = (px[:, None] + marker['dx'][None, :]).ravel()
+            ys = (py[:, None] + marker['dy'][None, :]).ravel()
+            keep = (xs >= x_lo) & (xs <= x_hi) & (ys >= y_lo) & (ys <= y_hi)
+            flat[ys[keep] * self.width + xs[keep]] = marker['color']
+        return self.buffer
+
+    # ---- Tk plumbing ----
+    def _build_window(self):
+        import tkinter as tk
+        from PIL import Image, ImageTk
+
+        self.root = tk.Tk()
+        self.root.title(self.title)
+        self._label = tk.Label(self.root, text=self._text, font=('Helvetica', 14))
+        self._label.pack(side='top')
+        # one RGBA image for the whole run, draw() copies the composed buffer into it
+        self._image = Image.new('RGBA', (self.width, self.height))
+        self._photo = ImageTk.PhotoImage(image=self._image)
+        self._canvas = tk.Canvas(self.root, width=self.width, height=self.height, highlightthickness=0)
+        self._canvas.create_image(0, 0, image=self._photo, anchor='nw')
+        self._canvas.pack()
+
+    def bind_keys(self, on_press, on_release=None):
+        """Callbacks get matplotlib-style key names ('left', 'up', 'w', ...)."""
+        if self.root is None:
+            self._build_window()
+        self.root.bind('<KeyPress>', lambda ev: on_press(ev.keysym.lower()))
+        if on_release is not None:
+            self.root.bind('<KeyRelease>', lambda ev: on_release(ev.keysym.lower()))
+
+    def draw(self):
+        self.compose()
+        self._image.frombytes(self.buffer)  # decodes into the existing image, no allocation
+        self._photo.paste(self._image)
+        self._label.configure(text=self._text, fg=self._text_color)
+
+    def run(self, step, interval=16, frames=None):
+        """Call `step(frame)` then draw, every `interval` ms, until `frames`, step() returns False, or window close."""
+        if self.root is None:
+            self._build_window()
+        frame = [0]
+        deadline = [time.perf_counter() * 1000.0]  # ms
+
+        def tick():
+            if frames is not None and frame[0] >= frames:
+                return
+            more = step(frame[0])
+            self.draw()
+            frame[0] += 1
+            if more is not False:
+                # next tick on the fixed grid (missed deadlines are skipped, not replayed in a burst)
+                now = time.perf_counter() * 1000.0
+                deadline[0] += interval * max(1, int((now - deadline[0]) // interval) + 1)
+                self.root.after(max(1, int(round(deadline[0] - now))), tick)
+
+        self.root.after(0, tick)
+        self.root.mainloop()
@@ -0,0 +1,128 @@
+import numpy as np
+
+"""
+Bounded, decimated trajectory trail for long replays
+- One fixed (2, capacity) array: [decimated history | recent points at full resolution]
+- The newest `recent` points are kept exactly; older ones are retired in chunks and simplified with
+  Ramer-Douglas-Peucker, so every dropped point lies within `tolerance` of the drawn polyline
+- When the history is full it is simplified again with a doubled tolerance, one chunk per append()
+  (a pass over the whole history is spread across appends); `error_bound` is the resulting
+  worst-case distance of any original point from the trail
+- x / y are views of the array (no per-frame lists), append() does at most one chunk of work and
+  memory is fixed, so drawing cost and frame time stay flat however long the replay runs
+"""
+
+RECENT_POINTS = 600     # full-resolution tail (1 min at 10 frames/s)
+HISTORY_POINTS = 2000   # max points kept for the decimated history
+TOLERANCE = 0.02        # initial simplification tolerance (trail units)
+CHUNK = 100             # points retired / re-simplified per step, bounds the work of one append()
+
+
+def simplify(xy, tolerance):
+    """Indices of the points kept by Ramer-Douglas-Peucker on a (2, n) polyline. First / last always kept."""
+    n = xy.shape[1]
+    if n < 3:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    tol2 = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        dx, dy = xy[0, b] - xy[0, a], xy[1, b] - xy[1, a]
+        rx, ry = xy[0, a + 1:b] - xy[0, a], xy[1, a + 1:b] - xy[1, a]
+        seg2 = dx * dx + dy * dy
+        # distance to the segment (not the infinite line), that's what gets drawn
+        u = np.clip((rx * dx + ry * dy) / seg2, 0.0, 1.0) if seg2 > 0 else 0.0
+        dist2 = (rx - u * dx) ** 2 + (ry - u * dy) ** 2
+        i = int(np.argmax(dist2))
+        if dist2[i] > tol2:
+            m = a + 1 + i
+            keep[m] = True
+            stack.append((a, m))
+            stack.append((m, b))
+    return np.flatnonzero(keep)
+
+
+class DecimatedTrail:
+    """Fixed-capacity polyline. append() points, draw the `x` / `y` views."""
+
+    def __init__(self, recent=RECENT_POINTS, history=HISTORY_POINTS, tolerance=TOLERANCE, chunk=None):
+        self.recent = recent
+        self.history = history
+        self.chunk = chunk or max(min(CHUNK, recent // 4), 1)
+        self.tolerance = tolerance
+        self.error_bound = 0.0
+        # history keeps growing by retired chunks while a re-simplification pass is in progress
+        self.slack = max(history // 8, 2 * self.chunk)
+        self._xy = np.empty((2, history + self.slack + recent + self.chunk + 1))
+        self.n_hist = 0     # points [0, n_hist) are decimated history
+        self.n = 0          # points [n_hist, n) are the full-resolution tail
+        self.appended = 0
+        self._cursor = None  # history position of the running re-simplification pass, None when idle
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def x(self):
+        return self._xy[0, :self.n]
+
+    @property
+    def y(self):
+        return self._xy[1, :self.n]
+
+    def append(self, x, y):
+        self._xy[0, self.n] = x
+        self._xy[1, self.n] = y
+        self.n += 1
+        self.appended += 1
+        if self._cursor is not None:
+            self._resimplify_step()
+        if self.n - self.n_hist >= self.recent + self.chunk:
+            self._retire()
+
+    def _compact(self, start, stop, tolerance, anchored):
+        """Simplify points [start, stop) in place and shift everything after them down. Returns kept count."""
+        lo = start - 1 if anchored else start  # simplify from the last kept point so the joint stays exact
+        keep = simplify(self._xy[:, lo:stop], tolerance) + lo
+        if anchored:
+            keep = keep[1:]
+        m = len(keep)
+        self._xy[:, start:start + m] = self._xy[:, keep]
+        rest = self.n - stop
+        self._xy[:, start + m:start + m + rest] = self._xy[:, stop:self.n]
+        self.n = start + m + rest
+        return m
+
+    def _start_pass(self):
+        # re-simplifying adds its tolerance on top of the existing error
+        self.tolerance *= 2.0
+        self.error_bound += self.tolerance
+        self._cursor = 0
+
+    def _resimplify_step(self):
+        """Re-simplify the next `chunk` history points of the running pass."""
+        start = self._cursor
+        stop = min(start + self.chunk, self.n_hist)
+        kept = self._compact(start, stop, self.tolerance, anchored=start > 0)
+        self.n_hist -= (stop - start) - kept
+        self._cursor = start + kept if start + kept < self.n_hist else None
+
+    def _retire(self):
+        """Move the oldest `chunk` tail points into the decimated history."""
+        # keep the buffer bound: a pass that would overrun the slack (or didn't shrink the history
+        # enough) finishes here. With the default sizes a pass takes ~history / chunk appends and
+        # adds about as many points, well inside the slack, so this doesn't run
+        while self.n_hist + self.chunk > self.history + self.slack:
+            if self._cursor is None:
+                self._start_pass()
+            self._resimplify_step()
+        start = self.n_hist
+        self.n_hist += self._compact(start, start + self.chunk, self.tolerance, anchored=start > 0)
+        if self.error_bound == 0.0:
+            self.error_bound = self.tolerance
+        if self.n_hist > self.history and self._cursor is None:
+            self._start_pass()
@@ -0,0 +1,114 @@
+import numpy as np
+
+"""
+Bulk validation / repair of loaded segments (list of sample dicts: id, Session, Expire, R, L, T)
+- Columns are built once, then checked with vectorized predicates over the whole block
+- quarantined (dropped) rows: R/L length mismatch, missing / non-finite T, expired samples
+  (only when a reference time `now` in the Expire clock is given), rows with no finite
+  pressure at all, duplicate T (first occurrence kept)
+- repaired rows: stable reorder by T (rows move with their timestamps), NaN pressures -> 0,
+  negative pressures clipped to 0
+- A compact report says what happened, downstream code can assume clean (T, N) blocks
+"""
+
+REPORT_KEYS = ('rows_in', 'rows_out', 'length_mismatch', 'bad_t', 'expired', 'empty_rows',
+               'duplicate_t', 'out_of_order', 'nan_values', 'negative_values')
+
+
+def expire_seconds(expire):
+    """Expire as float seconds. Accepts [seconds, nanos], {'seconds', 'nanos'}-like dicts or a number."""
+    if expire is None:
+        return np.nan
+    if isinstance(expire, dict):
+        vals = list(expire.values())
+        return float(vals[0]) + (float(vals[1]) * 1e-9 if len(vals) > 1 else 0.0)
+    if isinstance(expire, (list, tuple)):
+        return float(expire[0]) + (float(expire[1]) * 1e-9 if len(expire) > 1 else 0.0)
+    return float(expire)
+
+
+def _as_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def validate_segment(data, n_sensors=None, now=None):
+    """
+    Validate and repair a loaded segment.
+    now: expiry reference time in the Expire clock (seconds). Samples with Expire before it are
+    dropped. None (default) skips the expiry check: T's unit / clock isn't known to match Expire.
+    Returns (t, left, right, report); report['quarantined'] holds the dropped row indices.
+    """
+    n = len(data)
+    t = np.fromiter((_as_float(s.get("T")) for s in data), dtype=float, count=n)
+    expire = np.fromiter((expire_seconds(s.get("Expire")) for s in data), dtype=float, count=n)
+    len_r = np.fromiter((len(s.get("R") or ()) for s in data), dtype=np.intp, count=n)
+    len_l = np.fromiter((len(s.get("L") or ()) for s in data), dtype=np.intp, count=n)
+
+    if n_sensors is None:
+        lengths = np.concatenate([len_r, len_l])
+        lengths = lengths[lengths > 0]
+        n_sensors = int(np.bincount(lengths).argmax()) if len(lengths) else 0
+
+    # ---- row-level predicates ----
+    length_bad = (len_r != n_sensors) | (len_l != n_sensors)
+    t_bad = ~np.isfinite(t)
+    if now is None:
+        expired = np.zeros(n, dtype=bool)
+    else:
+        expired = np.isfinite(expire) & (expire < float(now))
+    keep = ~(length_bad | t_bad | expired)
+
+    rows = np.flatnonzero(keep)
+    right = np.array([data[i]["R"] for i in rows], dtype=float).reshape(len(rows), n_sensors)
+    left = np.array([data[i]["L"] for i in rows], dtype=float).reshape(len(rows), n_sensors)
+    t_kept = t[rows]
+
+    finite_r, finite_l = np.isfinite(right), np.isfinite(left)
+    empty = ~(finite_r.any(axis=1) | finite_l.any(axis=1)) if n_sensors else np.zeros(len(rows), dtype=bool)
+
+    # ---- stable reorder, then dedupe on T ----
+    out_of_order = int(np.count_nonzero(np.diff(t_kept) < 0))
+    order = np.argsort(t_kept, kind='stable')
+    order = order[~empty[order]]
+    t_sorted = t_kept[order]
+    dup = np.zeros(len(order), dtype=bool)
+    dup[1:] = t_sorted[1:] == t_sorted[:-1]
+    order = order[~dup]
+
+    t_out = t_kept[order]
+    right, left = right[order], left[order]
+    nan_values = int(np.count_nonzero(~finite_r[order]) + np.count_nonzero(~finite_l[order]))
+
+    # ---- value repair (in place) ----
+    negative_values = int(np.count_nonzero(right < 0) + np.count_nonzero(left < 0))
+    np.nan_to_num(right, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    np.nan_to_num(left, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    np.maximum(right, 0.0, out=right)
+    np.maximum(left, 0.0, out=left)
+
+    dropped_after = np.setdiff1d(np.arange(len(rows)), order)
+    report = {
+        'rows_in': n,
+        'rows_out': len(t_out),
+        'length_mismatch': int(np.count_nonzero(length_bad)),
+        'bad_t': int(np.count_nonzero(t_bad & ~length_bad)),
+        'expired': int(np.count_nonzero(expired & ~length_bad & ~t_bad)),
+        'empty_rows': int(np.count_nonzero(empty)),
+        'duplicate_t': int(np.count_nonzero(dup)),
+        'out_of_order': out_of_order,
+        'nan_values': nan_values,
+        'negative_values': negative_values,
+        'n_sensors': n_sensors,
+        'expiry_checked': now is not None,
+        'quarantined': np.sort(np.concatenate([np.flatnonzero(~keep), rows[dropped_after]])),
+    }
+    return t_out, left, right, report
+
+
+def format_report(report):
+    """One-line summary, only the non-zero problems."""
+    problems = [f"{k}={report[k]}" for k in REPORT_KEYS[2:] if report.get(k)]
+    return f"{report['rows_out']}/{report['rows_in']} rows kept" + (f" ({', '.join(problems)})" if problems else ", clean")
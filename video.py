@@ -1,62 +1,99 @@
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.animation import FuncAnimation, FFMpegWriter, PillowWriter
 from json_utils import load_json
+from layouts import load_layout
+from calibration import calibrate_segment
+from scheduler import FixedStepScheduler
+from validation import validate_segment, format_report
 
-# Define sensor layout (x,y) coordinates
-coords = []
-
-# First line: 3 sensors
-coords += [(i, 0) for i in range(3)]
-
-# Next 5 lines of 4 sensors
-for row in range(1, 6):
-    coords += [(i, row) for i in range(4)]
-
-# Next 3 lines of 2 sensors
-for row in range(6, 9):
-    coords += [(i, row) for i in range(2)]
-
-# Next 3 lines of 3 sensors
-for row in range(9, 12):
-    coords += [(i, row) for i in range(3)]
-
-# Last line: 2 sensors
-coords += [(i, 12) for i in range(2)]
-
-coords = np.array(coords)
+# Sensor layout: positions, mirrored foot and outline polygon (layouts/<name>.yaml, VR_STEPS_LAYOUT picks the insole)
+layout = load_layout()
 
 
 # --- Animation Function ---
-def animate_feet(left_data, right_data, coords, name, save_as=None):
+def animate_feet(left_data, right_data, layout, name, save_as=None, smooth=False):
+    if save_as and save_as.endswith(".gif") and not smooth:
+        # Dedicated GIF path: static figure rendered once, global palette, deduped delta frames
+        from gif_export import export_gif
+        export_gif(left_data, right_data, layout, name, save_as, fps=10)
+        print(f"Animation saved as {save_as}")
+        return
+
+    from matplotlib.animation import FuncAnimation, FFMpegWriter, PillowWriter
+    from gui_backend import use_gui_backend, use_headless_backend
+
+    # exports never need a window
+    plt = use_headless_backend() if save_as else use_gui_backend()
     fig, axes = plt.subplots(1, 2, figsize=(8, 12))
 
-    # Initial scatter plots
-    sc_left = axes[0].scatter(coords[:, 0], coords[:, 1], c=left_data[0],
-                              cmap='viridis', s=500, marker='s')
-    axes[0].set_title("Left Foot")
-    axes[0].invert_yaxis()
-    axes[0].axis('equal')
-
-    sc_right = axes[1].scatter(-coords[:, 0], coords[:, 1], c=right_data[0],
-                               cmap='viridis', s=500, marker='s')
-    axes[1].set_title("Right Foot")
-    axes[1].invert_yaxis()
-    axes[1].axis('equal')
+    if smooth:
+        # Foot-shaped interpolated maps, each drawn frame upsampled on demand (one sparse matvec per foot),
+        # so memory doesn't grow with the segment length
+        from sole_interp import SoleUpsampler
+        up_left = SoleUpsampler(np.column_stack(layout.positions('left')), outline=layout.outline_for('left'))
+        up_right = SoleUpsampler(np.column_stack(layout.positions('right')), outline=layout.outline_for('right'))
+        vmin = min(np.min(left_data), np.min(right_data))
+        vmax = max(np.max(left_data), np.max(right_data))
+        x0, x1, y0, y1 = up_left.extent
+        sc_left = axes[0].imshow(up_left(left_data[0]), cmap='viridis', vmin=vmin, vmax=vmax,
+                                 extent=(x0, x1, y1, y0), interpolation='bilinear')
+        x0, x1, y0, y1 = up_right.extent
+        sc_right = axes[1].imshow(up_right(right_data[0]), cmap='viridis', vmin=vmin, vmax=vmax,
+                                  extent=(x0, x1, y1, y0), interpolation='bilinear')
+        for ax, title in zip(axes, ("Left Foot", "Right Foot")):
+            ax.set_title(title)
+            ax.axis('off')
+    else:
+        # Initial scatter plots
+        sc_left = axes[0].scatter(*layout.positions('left'), c=left_data[0],
+                                  cmap='viridis', s=500, marker='s')
+        axes[0].set_title("Left Foot")
+        axes[0].invert_yaxis()
+        axes[0].axis('equal')
+
+        sc_right = axes[1].scatter(*layout.positions('right'), c=right_data[0],
+                                   cmap='viridis', s=500, marker='s')
+        axes[1].set_title("Right Foot")
+        axes[1].invert_yaxis()
+        axes[1].axis('equal')
 
     # Shared colorbar
     cbar = fig.colorbar(sc_left, ax=axes, orientation='horizontal', fraction=0.05)
     cbar.set_label("Sensor Value")
 
-    def update(frame):
-        sc_left.set_array(left_data[frame])
-        sc_right.set_array(right_data[frame])
+    def draw(frame):
+        if smooth:
+            sc_left.set_data(up_left(left_data[frame]))
+            sc_right.set_data(up_right(right_data[frame]))
+        else:
+            sc_left.set_array(left_data[frame])
+            sc_right.set_array(right_data[frame])
         fig.suptitle(f"Name: {name}\nFrame: {frame + 1}/{len(left_data)}")
         return sc_left, sc_right
 
-    ani = FuncAnimation(fig, update, frames=len(left_data), interval=100, blit=False)
+    if save_as:
+        # Export: every frame is written, no real-time pacing
+        ani = FuncAnimation(fig, draw, frames=len(left_data), interval=100, blit=False)
+    else:
+        # Live: playback position follows the wall clock (10 fps), slow draws drop frames instead of slowing down
+        playback = {'frame': 0}
+
+        def next_frame():
+            if playback['frame'] + 1 >= len(left_data):
+                return False
+            playback['frame'] += 1
+
+        sched = FixedStepScheduler(next_frame, dt=0.1)
+
+        def update(_):
+            ran = sched.advance()
+            if sched.done:
+                ani.event_source.stop()
+                print(sched.summary())
+            return draw(playback['frame']) if ran else (sc_left, sc_right)
+
+        ani = FuncAnimation(fig, update, interval=16, blit=False, cache_frame_data=False)
 
     # Save if requested
     if save_as:
@@ -71,7 +108,7 @@ def animate_feet(left_data, right_data, coords, name, save_as=None):
         plt.show()
 
 
-def load_data(save_name=None):
+def load_data(save_name=None, calibrate=False):
     json_folder = Path(
         r"G:\My Drive\הקוצ'ינים הצעירים\israeli-Indian Hackathon\Info for Participants\VR steps\Data\New data 18.08.25")
     json_name = r"Copy of pedisol_segment_0-8-sitdown"
@@ -92,9 +129,13 @@ def load_data(save_name=None):
     # L (list)
     # T (number)
 
-    t = np.sort([data[i]["T"] for i in range(len(data))])
-    right_data = np.vstack([data[i]["R"] for i in range(len(data))])
-    left_data = np.vstack([data[i]["L"] for i in range(len(data))])
+    # rows are validated / repaired and sorted by T together with their pressures
+    t, left_data, right_data, report = validate_segment(data)
+    print(f"{json_name}: {format_report(report)}")
+
+    if calibrate:
+        # offset / gain / dead-cell tables are estimated once per Session/id and cached
+        left_data, right_data = calibrate_segment(data, left_data, right_data, t=t)
 
     return left_data, right_data, json_name, save_name
 
@@ -112,5 +153,5 @@ if __name__ == '__main__':
         name = 'example'
         save_name = None
 
-    animate_feet(left_data=left_data, right_data=right_data, coords=coords,
+    animate_feet(left_data=left_data, right_data=right_data, layout=layout,
                  name=name, save_as=save_name)
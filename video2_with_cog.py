@@ -1,58 +1,79 @@
-import matplotlib.pyplot as plt
+import sys
+
 import numpy as np
-from matplotlib.animation import FuncAnimation
-
-# Example data: replace with your real data
-time_samples = 200
-left_data = np.random.rand(time_samples, 40)
-right_data = np.random.rand(time_samples, 40)
-
-# Define sensor layout (same as before)
-coords = []
-coords += [(i, 0) for i in range(3)]  # 1st row
-for row in range(1, 6): coords += [(i, row) for i in range(4)]  # 5 rows of 4
-for row in range(6, 9): coords += [(i, row) for i in range(2)]  # 3 rows of 2
-for row in range(9, 12): coords += [(i, row) for i in range(3)]  # 3 rows of 3
-coords += [(i, 12) for i in range(2)]  # last row
-coords = np.array(coords)
-
-
-def compute_cog(sensor_values, coords, mirror_x=False):
-    if mirror_x:
-        xs = -coords[:, 0]
-    else:
-        xs = coords[:, 0]
-    ys = coords[:, 1]
-    weights = sensor_values
-    if np.sum(weights) == 0:
-        return np.mean(xs), np.mean(ys)
-    cx = np.sum(xs * weights) / np.sum(weights)
-    cy = np.sum(ys * weights) / np.sum(weights)
-    return cx, cy
-
-
-def run_game_with_feet(left_data, right_data, coords):
+
+from layouts import load_layout, cog_from_table
+from scheduler import FixedStepScheduler
+from trail import DecimatedTrail
+
+# Sensor layout, top to bottom (layouts/<name>.yaml, VR_STEPS_LAYOUT picks the insole)
+layout = load_layout()
+
+
+def compute_cog(table, left_values, right_values):
+    """Combined CoG of one frame from a feet cog table, the table's center when there is no load."""
+    return cog_from_table(table, left_values, right_values, empty=tuple(table.mean(axis=0)))
+
+
+class ReplayState:
+    """Replay of recorded frames: CoG, character position and trail, advanced one data frame per step()."""
+
+    def __init__(self, left_data, right_data, layout, trail=None):
+        self.left_data, self.right_data = left_data, right_data
+        self.cog_table = layout.feet_table()  # both feet side by side around x = 0
+        self.frame = -1
+        self.cog = (0.0, 0.0)
+        self.char_pos = np.array([0.0, 0.0])
+        self.trail = DecimatedTrail() if trail is None else trail  # bounded: recent points exact, older decimated
+
+    def step(self):
+        if self.frame + 1 >= len(self.left_data):
+            return False
+        self.frame += 1
+        frame = self.frame
+
+        # Compute CoG
+        self.cog = compute_cog(self.cog_table, self.left_data[frame], self.right_data[frame])
+
+        # Move character
+        velocity = np.array(self.cog) * 0.05
+        self.char_pos = self.char_pos + velocity
+
+        # Trail
+        self.trail.append(self.char_pos[0], self.char_pos[1])
+
+    def title(self):
+        return f"Frame {self.frame+1}/{len(self.left_data)} | CoG=({self.cog[0]:.2f},{self.cog[1]:.2f})"
+
+
+def run_game_with_feet(left_data, right_data, layout, backend='matplotlib', frame_dt=0.1):
+    """Replay at `frame_dt` seconds per data frame in wall-clock time, whatever the draw speed."""
+    if backend == 'tk':
+        return run_game_with_feet_tk(left_data, right_data, layout, frame_dt=frame_dt)
+
+    from matplotlib.animation import FuncAnimation
+    from gui_backend import use_gui_backend
+
+    plt = use_gui_backend()
     fig, axes = plt.subplots(1, 3, figsize=(15, 6))
 
     # --- Left foot ---
-    sc_left = axes[0].scatter(coords[:, 0], coords[:, 1], c=left_data[0],
+    sc_left = axes[0].scatter(*layout.positions('left'), c=left_data[0],
                               cmap='viridis', s=300, marker='s')
     axes[0].set_title("Left Foot")
     axes[0].invert_yaxis()
     axes[0].axis('equal')
 
-    # --- Right foot (mirrored) ---
-    sc_right = axes[1].scatter(-coords[:, 0], coords[:, 1], c=right_data[0],
+    # --- Right foot ---
+    sc_right = axes[1].scatter(*layout.positions('right'), c=right_data[0],
                                cmap='viridis', s=300, marker='s')
     axes[1].set_title("Right Foot")
     axes[1].invert_yaxis()
     axes[1].axis('equal')
 
     # --- Character movement ---
-    char_pos = np.array([0.0, 0.0])
     char_dot, = axes[2].plot([], [], 'ro', markersize=12)
     trail, = axes[2].plot([], [], 'b-', alpha=0.5)  # path trail
-    path_x, path_y = [], []
     axes[2].set_xlim(-10, 10)
     axes[2].set_ylim(-10, 10)
     axes[2].set_title("Character Movement")
@@ -61,36 +82,73 @@ def run_game_with_feet(left_data, right_data, coords):
     # Shared colorbar
     fig.colorbar(sc_left, ax=axes[:2], orientation='horizontal', fraction=0.05)
 
-    def update(frame):
-        nonlocal char_pos, path_x, path_y
-
-        # Update feet
-        sc_left.set_array(left_data[frame])
-        sc_right.set_array(right_data[frame])
-
-        # Compute CoG
-        cog_left = compute_cog(left_data[frame], coords, mirror_x=False)
-        cog_right = compute_cog(right_data[frame], coords, mirror_x=True)
-        cog = ((cog_left[0] + cog_right[0]) / 2,
-               (cog_left[1] + cog_right[1]) / 2)
-
-        # Move character
-        velocity = np.array(cog) * 0.05
-        char_pos = char_pos + velocity
-        char_dot.set_data([char_pos[0]], [char_pos[1]])
-
-        # Trail
-        path_x.append(char_pos[0])
-        path_y.append(char_pos[1])
-        trail.set_data(path_x, path_y)
-
-        fig.suptitle(f"Frame {frame+1}/{len(left_data)} | CoG=({cog[0]:.2f},{cog[1]:.2f})")
+    replay = ReplayState(left_data, right_data, layout)
+    sched = FixedStepScheduler(replay.step, dt=frame_dt)
+
+    def update(_):
+        ran = sched.advance()
+        if sched.done:
+            ani.event_source.stop()
+            print(sched.summary())
+        if ran == 0:
+            return sc_left, sc_right, char_dot, trail
+
+        # Draw only the latest replayed frame
+        sc_left.set_array(left_data[replay.frame])
+        sc_right.set_array(right_data[replay.frame])
+        char_dot.set_data([replay.char_pos[0]], [replay.char_pos[1]])
+        trail.set_data(replay.trail.x, replay.trail.y)
+        fig.suptitle(f"{replay.title()} | dropped {sched.dropped}")
         return sc_left, sc_right, char_dot, trail
 
-    ani = FuncAnimation(fig, update, frames=len(left_data), interval=100, blit=False)
+    ani = FuncAnimation(fig, update, interval=16, blit=False, cache_frame_data=False)
     plt.show()
     return ani
 
 
-# Run
-ani = run_game_with_feet(left_data, right_data, coords)
+def run_game_with_feet_tk(left_data, right_data, layout, width=1200, height=480, interval=16, frame_dt=0.1):
+    """Same replay as `run_game_with_feet`, drawn through the Tk canvas backend."""
+    from tk_view import TkCanvasView, RED, BLUE
+
+    view = TkCanvasView(width, height, title='VR steps - replay')
+    third = width // 3
+    (x_left, y_left), (x_right, y_right) = layout.positions('left'), layout.positions('right')
+    x_lim = (-1, layout.width + 1)
+    y_lim = (-1, layout.height + 1)
+    vmin, vmax = min(left_data.min(), right_data.min()), max(left_data.max(), right_data.max())
+    left_panel = view.add_panel(x_lim, y_lim, (8, 8, third - 16, height - 16), invert_y=True)
+    right_panel = view.add_panel(x_lim, y_lim, (third + 8, 8, third - 16, height - 16), invert_y=True)
+    game_panel = view.add_panel((-10, 10), (-10, 10), (2 * third + 8, 8, third - 16, height - 16))
+    view.add_hline(game_panel, 0.0)
+    view.add_vline(game_panel, 0.0)
+    left_hm = view.add_heatmap(left_panel, x_left, y_left, 0.8, vmin=vmin, vmax=vmax)
+    right_hm = view.add_heatmap(right_panel, x_right, y_right, 0.8, vmin=vmin, vmax=vmax)
+    view.add_line('trail', game_panel, BLUE)
+    view.add_marker('char', game_panel, 7, RED)
+
+    replay = ReplayState(left_data, right_data, layout)
+    sched = FixedStepScheduler(replay.step, dt=frame_dt)
+
+    def step(_):
+        if sched.advance() and replay.frame >= 0:
+            view.set_heatmap(left_hm, left_data[replay.frame])
+            view.set_heatmap(right_hm, right_data[replay.frame])
+            view.set_line('trail', replay.trail.x, replay.trail.y)
+            view.set_marker('char', [replay.char_pos[0]], [replay.char_pos[1]])
+            view.set_text(f"{replay.title()} | dropped {sched.dropped}")
+        return not sched.done
+
+    view.run(step, interval=interval)
+    print(sched.summary())
+    return view
+
+
+if __name__ == '__main__':
+    # Example data: replace with your real data
+    time_samples = 200
+    left_data = np.random.rand(time_samples, 40)
+    right_data = np.random.rand(time_samples, 40)
+
+    # Run (python video2_with_cog.py [matplotlib|tk])
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'matplotlib'
+    ani = run_game_with_feet(left_data, right_data, layout, backend=backend)